@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Process-wide API Response Cache
+
+Memoizes read-only GitHubTeamRepoMapper calls so repeated lookups within a
+process (e.g. several quick_start menu actions in a row) reuse recent
+results instead of refetching them:
+
+- entries expire after a per-call TTL
+- the cache holds at most `maxsize` entries, evicting the least recently used
+- concurrent identical calls are coalesced: one thread makes the request,
+  the others wait for its result
+- writes invalidate the affected entries (see TTLCache.invalidate)
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from typing import Any, Callable, Hashable, Optional
+
+DEFAULT_MAXSIZE = 10000
+DEFAULT_TTL = 300.0
+
+
+class _Pending:
+    """An in-flight computation that other callers can wait for"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and request coalescing"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._pending = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: float) -> Any:
+        """Return the cached value for key, computing it (once) if missing or expired"""
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _Pending()
+                epoch = self._epoch
+                self.misses += 1
+
+        if not leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                # Don't store results that raced with an invalidation
+                if pending.error is None and epoch == self._epoch:
+                    self._entries[key] = (pending.value, time.monotonic() + ttl)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            pending.event.set()
+        return pending.value
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop entries whose key matches predicate (all entries if None)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self._epoch += 1
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every GitHubTeamRepoMapper in the process
+API_CACHE = TTLCache()
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn call arguments (lists, dicts, dataclasses) into a hashable key part"""
+    if is_dataclass(value) and not isinstance(value, type):
+        value = asdict(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached_api_call(ttl: float = DEFAULT_TTL):
+    """
+    Memoize a GitHubTeamRepoMapper method in API_CACHE
+
+    Cache keys are (mapper.cache_namespace, method name, arguments), so
+    mappers for different organizations or tokens never share entries.
+    List results are copied on the way out, so callers may add, remove or
+    reorder items without affecting the cached list. The items themselves
+    (Repository, Team, ...) are shared between callers: treat them as
+    read-only, and copy one before changing it.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not self.use_cache:
+                return func(self, *args, **kwargs)
+            key = (self.cache_namespace, func.__name__, _freeze(args), _freeze(kwargs))
+            value = API_CACHE.get_or_compute(key, lambda: func(self, *args, **kwargs), ttl)
+            return list(value) if isinstance(value, list) else value
+        return wrapper
+    return decorator
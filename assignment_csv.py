@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Streaming Bulk-Assignment CSV Ingestion
+
+Reads a bulk assignment CSV (team_slug, repo_owner, repo_name, permission)
+row by row and validates every row locally before any permission change is
+sent:
+
+- the permission must be one of pull, triage, push, maintain, admin
+- the team and repository must exist in the organization, checked against
+  an index built from the (cached) team and repository listings
+- duplicate rows for the same team and repository are merged; conflicting
+  ones are resolved by policy: 'last' (last row wins) or 'max' (highest
+  permission wins)
+
+Rejected rows are written to an error CSV together with the reason. Memory
+use grows with the number of distinct team/repository pairs, not with the
+number of rows in the file.
+"""
+
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+REQUIRED_COLUMNS = ('team_slug', 'repo_owner', 'repo_name', 'permission')
+
+# Lowest to highest
+PERMISSION_ORDER = ('pull', 'triage', 'push', 'maintain', 'admin')
+PERMISSION_RANK = {name: rank for rank, name in enumerate(PERMISSION_ORDER)}
+
+DUPLICATE_POLICIES = ('last', 'max')
+
+AssignmentKey = Tuple[str, str, str]
+
+
+class AssignmentCSVError(ValueError):
+    """The CSV file as a whole cannot be used (e.g. missing columns)"""
+
+
+@dataclass
+class OrgIndex:
+    """Hash index of an organization's team slugs and repositories (case-insensitive)"""
+    team_slugs: Set[str]
+    repositories: Set[Tuple[str, str]]
+
+    @classmethod
+    def from_mapper(cls, mapper) -> 'OrgIndex':
+        """Build the index from the mapper's (cached) team and repository listings"""
+        return cls(
+            team_slugs={team.slug.lower() for team in mapper.list_organization_teams()},
+            repositories={(repo.owner.lower(), repo.name.lower())
+                          for repo in mapper.list_organization_repositories()}
+        )
+
+    def has_team(self, slug: str) -> bool:
+        return slug.lower() in self.team_slugs
+
+    def has_repository(self, owner: str, name: str) -> bool:
+        return (owner.lower(), name.lower()) in self.repositories
+
+
+@dataclass
+class IngestResult:
+    """
+    Outcome of reading and validating an assignment CSV
+
+    Iterating the result yields the accepted assignments as dicts in the
+    format bulk_assign_permissions expects, so it can be passed directly.
+    """
+    assignments: Dict[AssignmentKey, Dict] = field(default_factory=dict)
+    total_rows: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    conflicts: int = 0
+    error_file: Optional[str] = None
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.assignments.values())
+
+    def __len__(self) -> int:
+        return len(self.assignments)
+
+
+def iter_assignment_rows(filename: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Stream (line number, row) pairs from an assignment CSV
+
+    Blank lines and comment lines starting with '#' (as in the template)
+    are skipped; values are stripped of surrounding whitespace.
+
+    Raises:
+        AssignmentCSVError: If a required column is missing from the header
+    """
+    line_number = 0
+
+    def data_lines(f):
+        nonlocal line_number
+        for line_number, line in enumerate(f, 1):
+            if line.strip() and not line.lstrip().startswith('#'):
+                yield line
+
+    with open(filename, 'r', newline='') as f:
+        reader = csv.DictReader(data_lines(f))
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise AssignmentCSVError(f"Missing required column(s): {', '.join(missing)}")
+        for row in reader:
+            yield line_number, {c: (row.get(c) or '').strip() for c in REQUIRED_COLUMNS}
+
+
+def validate_row(row: Dict, index: Optional[OrgIndex]) -> Optional[str]:
+    """Return why a row must be rejected, or None if it is valid"""
+    empty = [c for c in REQUIRED_COLUMNS if not row[c]]
+    if empty:
+        return f"empty {', '.join(empty)}"
+    if row['permission'] not in PERMISSION_RANK:
+        return f"invalid permission '{row['permission']}' (expected {', '.join(PERMISSION_ORDER)})"
+    if index is not None:
+        if not index.has_team(row['team_slug']):
+            return f"unknown team '{row['team_slug']}'"
+        if not index.has_repository(row['repo_owner'], row['repo_name']):
+            return f"unknown repository '{row['repo_owner']}/{row['repo_name']}'"
+    return None
+
+
+def ingest_assignment_csv(filename: str, index: Optional[OrgIndex] = None,
+                          duplicate_policy: str = 'last',
+                          error_file: Optional[str] = None) -> IngestResult:
+    """
+    Read, validate and de-duplicate an assignment CSV in one streaming pass
+
+    Args:
+        filename: CSV file to read
+        index: Organization index to validate teams and repositories against
+            (skipped if None)
+        duplicate_policy: 'last' or 'max', for conflicting rows of the same
+            team and repository
+        error_file: Where to write rejected rows (default: <filename>_errors.csv);
+            only created when a row is rejected. An error file left by an
+            earlier run is removed first, so it never lists stale rows
+
+    Raises:
+        AssignmentCSVError: If the file's header is missing required columns
+    """
+    if duplicate_policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy '{duplicate_policy}' (expected last or max)")
+    if error_file is None:
+        error_file = (filename[:-4] if filename.endswith('.csv') else filename) + '_errors.csv'
+
+    if os.path.exists(error_file):
+        os.remove(error_file)
+
+    result = IngestResult()
+    errors = None
+    error_writer = None
+    try:
+        for line_number, row in iter_assignment_rows(filename):
+            result.total_rows += 1
+            reason = validate_row(row, index)
+            if reason is not None:
+                if error_writer is None:
+                    errors = open(error_file, 'w', newline='')
+                    error_writer = csv.writer(errors)
+                    error_writer.writerow(('line',) + REQUIRED_COLUMNS + ('error',))
+                error_writer.writerow((line_number,) + tuple(row[c] for c in REQUIRED_COLUMNS) + (reason,))
+                result.rejected += 1
+                continue
+
+            # GitHub slugs and repository names are case-insensitive
+            key = (row['team_slug'].lower(), row['repo_owner'].lower(), row['repo_name'].lower())
+            permission = row['permission']
+            previous = result.assignments.get(key)
+            if previous is not None:
+                result.duplicates += 1
+                if previous['permission'] != permission:
+                    result.conflicts += 1
+                    if duplicate_policy == 'max' and PERMISSION_RANK[previous['permission']] > PERMISSION_RANK[permission]:
+                        continue
+            result.assignments[key] = row
+    finally:
+        if errors is not None:
+            errors.close()
+            result.error_file = error_file
+
+    return result
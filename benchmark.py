@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the CPU-side mapping pipeline
+
+Times the local work of each stage on synthetic organizations, with the
+HTTP layer replaced by canned responses and the rate-limit delays skipped:
+
+- mapping:     generate_complete_team_repo_mapping (pagination, response
+               decoding, dataclass building, aggregation)
+- export_json: export_mapping_to_json
+- report:      print_summary_report
+
+Sizes are the number of team × repository permission checks (10k, 100k,
+1M, 5M). The mapper runs in its default configuration, response cache
+included (--no-cache to bypass it); the cache is emptied before each mapping
+run so every run is a cold one. For every stage and size the benchmark
+records the best wall time of --repeat runs, then makes one extra run under
+tracemalloc for the peak and retained memory and the number of blocks
+allocated during the run that are still alive at its end.
+
+The total number of allocations a stage makes is not measured: CPython has
+no allocation counter, and tracemalloc only reports blocks that are alive
+when it is asked (retained blocks) plus the peak of traced memory. Peak
+memory is the closest proxy for allocation churn.
+
+    python3 benchmark.py --sizes 10k,100k --save-baseline benchmark_baseline.json
+    python3 benchmark.py --sizes 10k,100k --compare benchmark_baseline.json
+
+A comparison run exits with status 1 if any stage is slower, or uses more
+peak memory or retains more blocks than its baseline by more than the
+tolerance. Baselines recorded with a different --grant-density, --repeat or
+cache setting are rejected (status 2). Baselines are machine-specific:
+record them on the machine that runs the comparison.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import github_team_repo_mapper
+from api_cache import API_CACHE
+from github_team_repo_mapper import GitHubTeamRepoMapper
+
+ROLES = ('pull', 'triage', 'push', 'maintain', 'admin')
+
+# Checks per size, and the (teams, repositories) shape used for it
+SIZES = {
+    '10k': (50, 200),
+    '100k': (200, 500),
+    '1M': (500, 2000),
+    '5M': (1000, 5000),
+}
+
+# 5M takes several minutes per stage, so it only runs when asked for
+DEFAULT_SIZES = '10k,100k,1M'
+
+STAGES = ('mapping', 'export_json', 'report')
+
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_TIME_DELTA = 0.005
+# Likewise for retained blocks (interpreter caches, interned strings)
+MIN_BLOCKS_DELTA = 100
+
+# Run settings a baseline must share with the run it is compared against
+BASELINE_SETTINGS = ('grant_density', 'repeat', 'use_cache')
+
+
+class _StubResponse:
+    """Minimal stand-in for requests.Response"""
+    __slots__ = ('status_code', 'headers', 'text', '_data')
+
+    def __init__(self, status_code: int, data=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = '' if data is None else '<json>'
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class SyntheticOrg:
+    """
+    Canned GitHub API responses for a synthetic organization
+
+    Team i has access to repository j when (i * 7 + j) modulo 100 is below
+    grant_density * 100; its role cycles through ROLES. Responses are built
+    up front so that serving a request costs only a URL split and a lookup.
+    """
+
+    def __init__(self, teams: int, repos: int, grant_density: float = 0.2, org: str = 'bench-org'):
+        self.org = org
+        self.team_count = teams
+        self.repo_count = repos
+        self.cutoff = int(grant_density * 100)
+        self.team_pages = self._pages([{
+            'id': i,
+            'name': f'Team {i}',
+            'slug': f'team-{i}',
+            'description': f'Synthetic team {i}',
+            'privacy': 'closed',
+            'permission': 'pull',
+            'members_count': i % 50,
+            'repos_count': 0,
+        } for i in range(teams)])
+        self.repo_pages = self._pages([{
+            'id': j,
+            'name': f'repo-{j}',
+            'full_name': f'{org}/repo-{j}',
+            'private': j % 3 == 0,
+            'description': f'Synthetic repository {j}',
+            'default_branch': 'main',
+            'created_at': '2020-01-01T00:00:00Z',
+            'updated_at': '2024-01-01T00:00:00Z',
+            'owner': {'login': org},
+            'archived': j % 20 == 0,
+            'visibility': 'private' if j % 3 == 0 else 'public',
+            'topics': ['synthetic'],
+        } for j in range(repos)])
+        # One 200 response per repository and role
+        self.grants = [[_StubResponse(200, {
+            'full_name': f'{org}/repo-{j}',
+            'role_name': role,
+            'permissions': {name: rank <= ROLES.index(role) for rank, name in enumerate(ROLES)},
+        }) for role in ROLES] for j in range(repos)]
+        self.no_access = _StubResponse(404, {'message': 'Not Found'})
+        self.empty = _StubResponse(200, [])
+
+    @staticmethod
+    def _pages(items: List[Dict]) -> List[_StubResponse]:
+        return [_StubResponse(200, items[start:start + 100]) for start in range(0, len(items), 100)]
+
+    @property
+    def checks(self) -> int:
+        return self.team_count * self.repo_count
+
+    def request(self, method: str, url: str, **kwargs) -> _StubResponse:
+        """Serve a request the way Session.request would"""
+        path, _, query = url.partition('?')
+        parts = path.split('/')
+        if parts[-3] == 'repos':
+            # /orgs/{org}/teams/{slug}/repos/{owner}/{repo}
+            team = int(parts[-4][5:])
+            repo = int(parts[-1][5:])
+            if (team * 7 + repo) % 100 < self.cutoff:
+                return self.grants[repo][(team + repo) % len(ROLES)]
+            return self.no_access
+        pages = self.repo_pages if parts[-1] == 'repos' else self.team_pages
+        page = int(query.split('page=')[1].split('&')[0])
+        return pages[page - 1] if page <= len(pages) else self.empty
+
+
+class _NoSleepTime:
+    """The time module without sleep(), so rate-limit delays don't count"""
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds: float):
+        pass
+
+
+@contextlib.contextmanager
+def stubbed_mapper(org: SyntheticOrg, use_cache: bool = True):
+    """Yield a mapper whose HTTP session serves the synthetic organization"""
+    mapper = GitHubTeamRepoMapper('benchmark-token', org.org, use_cache=use_cache)
+    mapper.session.request = org.request
+    real_time = github_team_repo_mapper.time
+    github_team_repo_mapper.time = _NoSleepTime()
+    try:
+        yield mapper
+    finally:
+        github_team_repo_mapper.time = real_time
+        API_CACHE.invalidate()
+
+
+@dataclass
+class StageResult:
+    """
+    Measurements of one stage at one size
+
+    Attributes:
+        time_s: Best wall time of the timed runs
+        peak_mb: Peak traced memory during the memory run
+        retained_mb: Traced memory still allocated at the end of the memory run
+        retained_blocks: Blocks allocated during the memory run and still
+            alive at its end (not the number of allocations made)
+    """
+    stage: str
+    size: str
+    checks: int
+    time_s: float
+    peak_mb: Optional[float] = None
+    retained_mb: Optional[float] = None
+    retained_blocks: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.stage}@{self.size}"
+
+
+def measure(stage: str, size: str, checks: int, run: Callable[[], object],
+            repeat: int, memory: bool) -> Tuple[StageResult, object]:
+    """
+    Time a stage (best of `repeat` runs), then measure its memory once
+
+    Returns:
+        The measurements and the stage's return value (from the last run)
+    """
+    best = float('inf')
+    value = None
+    for _ in range(repeat):
+        value = None
+        gc.collect()
+        start = time.perf_counter()
+        value = run()
+        best = min(best, time.perf_counter() - start)
+    result = StageResult(stage, size, checks, round(best, 4))
+
+    if memory:
+        value = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            value = run()
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+            # Only blocks allocated since start() are traced
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        result.peak_mb = round(peak / 2**20, 2)
+        result.retained_mb = round(current / 2**20, 2)
+        result.retained_blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    return result, value
+
+
+def run_size(size: str, stages: List[str], repeat: int, memory: bool,
+             grant_density: float, workdir: str, use_cache: bool = True) -> List[StageResult]:
+    """Run the selected stages on one synthetic organization"""
+    teams, repos = SIZES[size]
+    org = SyntheticOrg(teams, repos, grant_density)
+    results = []
+    output = os.path.join(workdir, f'mapping_{size}.json')
+
+    with open(os.devnull, 'w') as devnull, stubbed_mapper(org, use_cache) as mapper:
+        def cold_mapping():
+            API_CACHE.invalidate()
+            return mapper.generate_complete_team_repo_mapping()
+
+        with contextlib.redirect_stdout(devnull):
+            # Later stages need the mapping, so it is built even when not benchmarked
+            timed = 'mapping' in stages
+            result, mapping = measure('mapping', size, org.checks, cold_mapping,
+                                      repeat if timed else 1, memory and timed)
+        if timed:
+            results.append(result)
+
+        for stage, run in (('export_json', lambda: mapper.export_mapping_to_json(mapping, output)),
+                           ('report', lambda: mapper.print_summary_report(mapping))):
+            if stage in stages:
+                with contextlib.redirect_stdout(devnull):
+                    results.append(measure(stage, size, org.checks, run, repeat, memory)[0])
+    if os.path.exists(output):
+        os.remove(output)
+    return results
+
+
+def check_baseline(baseline: Dict, settings: Dict):
+    """
+    Raise ValueError if the baseline was recorded with different run settings
+
+    Results measured with another grant density, repeat count or cache
+    setting are not comparable, so such a baseline is rejected rather than
+    reported as a regression (or a non-regression).
+    """
+    mismatched = [f"{name}={baseline.get(name)!r} (this run: {settings[name]!r})"
+                  for name in BASELINE_SETTINGS if baseline.get(name) != settings[name]]
+    if mismatched:
+        raise ValueError(f"Baseline was recorded with different settings: {', '.join(mismatched)}")
+
+
+def compare(results: List[StageResult], baseline: Dict, settings: Dict, time_tolerance: float,
+            memory_tolerance: float) -> List[str]:
+    """
+    Return a description of every stage that regressed against the baseline
+
+    Raises:
+        ValueError: If the baseline's run settings differ from `settings`
+    """
+    check_baseline(baseline, settings)
+    regressions = []
+    base_results = baseline.get('results', {})
+    for result in results:
+        base = base_results.get(result.key)
+        if base is None:
+            continue
+        if result.time_s > max(base['time_s'] * (1 + time_tolerance), base['time_s'] + MIN_TIME_DELTA):
+            regressions.append(f"{result.key}: time {base['time_s']:.3f}s → {result.time_s:.3f}s")
+        if (result.peak_mb is not None and base.get('peak_mb') is not None
+                and result.peak_mb > base['peak_mb'] * (1 + memory_tolerance)):
+            regressions.append(f"{result.key}: peak memory {base['peak_mb']:.1f} MB → {result.peak_mb:.1f} MB")
+        if (result.retained_blocks is not None and base.get('retained_blocks') is not None
+                and result.retained_blocks > max(base['retained_blocks'] * (1 + memory_tolerance),
+                                                 base['retained_blocks'] + MIN_BLOCKS_DELTA)):
+            regressions.append(f"{result.key}: retained blocks {base['retained_blocks']} → {result.retained_blocks}")
+    return regressions
+
+
+def _change(value: Optional[float], base: Optional[float]) -> str:
+    if value is None or not base:
+        return ''
+    return f"{(value - base) / base * 100:+.0f}%"
+
+
+def print_results(results: List[StageResult], baseline: Optional[Dict] = None):
+    """Print a results table, with changes against the baseline if given"""
+    base_results = (baseline or {}).get('results', {})
+    print(f"{'stage':<12} {'size':>5} {'time (s)':>10} {'Δ':>6} {'peak MB':>9} {'Δ':>6} "
+          f"{'retained MB':>12} {'ret. blocks':>12}")
+    print("-" * 80)
+    for r in results:
+        base = base_results.get(r.key, {})
+        peak = f"{r.peak_mb:.1f}" if r.peak_mb is not None else '-'
+        retained = f"{r.retained_mb:.1f}" if r.retained_mb is not None else '-'
+        blocks = r.retained_blocks if r.retained_blocks is not None else '-'
+        print(f"{r.stage:<12} {r.size:>5} {r.time_s:>10.3f} {_change(r.time_s, base.get('time_s')):>6} "
+              f"{peak:>9} {_change(r.peak_mb, base.get('peak_mb')):>6} {retained:>12} {blocks:>12}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description='Benchmark the mapping, export and report stages')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"comma-separated sizes ({', '.join(SIZES)}; default: {DEFAULT_SIZES})")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"comma-separated stages ({', '.join(STAGES)}; default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (best is kept)')
+    parser.add_argument('--grant-density', type=float, default=0.2,
+                        help='fraction of checks that find access (default: 0.2)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='map with use_cache=False instead of the default configuration')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('-o', '--output', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--save-baseline', metavar='FILE', help='store results as the baseline')
+    parser.add_argument('--compare', metavar='FILE', help='fail if results regress against this baseline')
+    parser.add_argument('--time-tolerance', type=float, default=0.25,
+                        help='allowed slowdown before failing (default: 0.25 = 25%%)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.10,
+                        help='allowed peak memory and retained block growth before failing '
+                             '(default: 0.10 = 10%%)')
+    return parser
+
+
+def main():
+    """Command-line entry point"""
+    parser = build_parser()
+    args = parser.parse_args()
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES] + [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown size or stage: {', '.join(unknown)}")
+
+    settings = {'grant_density': args.grant_density, 'repeat': args.repeat, 'use_cache': not args.no_cache}
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Checked before the (possibly long) run rather than after it
+        try:
+            check_baseline(baseline, settings)
+        except ValueError as e:
+            parser.error(str(e))
+        if baseline.get('python') != platform.python_version():
+            print(f"⚠️  Baseline was recorded with Python {baseline.get('python')}, "
+                  f"running {platform.python_version()}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            print(f"⏱️  {size} checks ({SIZES[size][0]} teams × {SIZES[size][1]} repositories)...", file=sys.stderr)
+            results.extend(run_size(size, stages, args.repeat, not args.no_memory,
+                                    args.grant_density, workdir, settings['use_cache']))
+
+    print_results(results, baseline)
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        **settings,
+        'results': {r.key: asdict(r) for r in results},
+    }
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            with open(filename, 'w') as f:
+                json.dump(document, f, indent=2)
+            print(f"💾 Results written to {filename}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, settings, args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+GitHub Team-Repository Mapping - Command Line Interface
+
+Non-interactive entry point for scheduled jobs (cron, CI):
+
+    python3 cli.py map       [scope filters] [-o mapping.json] [--out-of-core DIR] [--parquet DIR] ...
+    python3 cli.py overview  [scope filters]
+    python3 cli.py assign    assignments.csv [--dry-run] [--offline] [--yes] [--policy last|max]
+    python3 cli.py diff      old.json new.json
+    python3 cli.py export    mapping.json|STORE_DIR [--parquet DIR] [--arrow DIR] [--csv-matrix FILE] [--json FILE]
+    python3 cli.py report    mapping.json|STORE_DIR [--format text|markdown|json] ...
+
+quick_start.py forwards to this CLI when given arguments.
+
+Heavy modules (requests and the mapper) are only imported by commands that
+talk to the API, so --help and local commands (diff, report, export,
+assign --dry-run --offline) start quickly.
+
+With --json, stdout carries one JSON object per line: progress events
+({"event": "permission_checked", ...}) followed by a final
+{"event": "result", ...}; human-readable messages go to stderr instead.
+
+--profile [TRACE_FILE] records the run's phases and API requests as trace
+spans (see profiling.py), writes them as a Chrome trace and prints a
+per-span wall/CPU breakdown to stderr.
+
+Exit codes:
+    0    success
+    1    unexpected error
+    2    usage error (bad arguments, missing credentials, unreadable input)
+    3    GitHub API error (a partial mapping is saved when available)
+    4    partial success (rejected CSV rows or failed assignments)
+    5    diff found differences
+    130  interrupted
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_API_ERROR = 3
+EXIT_PARTIAL = 4
+EXIT_DIFFERENCES = 5
+EXIT_INTERRUPTED = 130
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class UsageError(ValueError):
+    """Invalid input detected before any work was done"""
+
+
+class Output:
+    """
+    Routes command output
+
+    In JSON mode, events are written as JSON lines to stdout and everything
+    printed by the tool itself is redirected to stderr; with --quiet it is
+    discarded.
+    """
+
+    def __init__(self, json_mode: bool, quiet: bool):
+        self.json_mode = json_mode
+        self.quiet = quiet
+        self.stdout = sys.stdout
+        self._result = None
+
+    def event(self, event: str, **fields):
+        """Write a progress event (JSON mode only)"""
+        if self.json_mode:
+            self.stdout.write(json.dumps({'event': event, **fields}, default=str) + '\n')
+            self.stdout.flush()
+
+    def result(self, **fields):
+        """Set the final result event (written by finish())"""
+        self._result = fields
+
+    def finish(self):
+        """Write the final result event, if one was set"""
+        if self._result is not None:
+            self.event('result', **self._result)
+
+    def message(self, text: str):
+        """Write a human-readable message"""
+        if not self.quiet:
+            print(text, file=sys.stderr if self.json_mode else self.stdout)
+
+    @contextlib.contextmanager
+    def human_output(self):
+        """Redirect print() output of the tool away from the JSON stream"""
+        if self.quiet:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                yield
+        elif self.json_mode:
+            with contextlib.redirect_stdout(sys.stderr):
+                yield
+        else:
+            yield
+
+
+def _credentials(require_token: bool = True):
+    """Return (token, org) from the environment, or raise UsageError"""
+    token = os.getenv('GITHUB_TOKEN')
+    org = os.getenv('GITHUB_ORG')
+    if (require_token and not token) or not org:
+        raise UsageError("Set GITHUB_TOKEN and GITHUB_ORG environment variables")
+    return token, org
+
+
+def _mapper(args: argparse.Namespace, out: Output):
+    """Create a mapper that reports progress events to the output (and spans to the profiler)"""
+    token, org = _credentials()
+    from github_team_repo_mapper import GitHubTeamRepoMapper
+    return GitHubTeamRepoMapper(token, org, progress=out.event if out.json_mode else None,
+                                tracer=args.tracer)
+
+
+def _span(args: argparse.Namespace, name: str):
+    """Trace span for a command phase (a no-op unless --profile is given)"""
+    if args.tracer is None:
+        return contextlib.nullcontext()
+    return args.tracer.span(name)
+
+
+def _load_mapping(path: str):
+    """Load a mapping JSON file, or open an out-of-core store directory"""
+    if os.path.isdir(path):
+        from edge_store import EdgeStore
+        try:
+            return EdgeStore.open(path)
+        except (OSError, ValueError) as e:
+            # e.g. a store whose mapping run never finished writing meta.json
+            raise UsageError(f"Cannot open mapping store {path}: {e}")
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise UsageError(f"Cannot read mapping {path}: {e}")
+
+
+def add_scope_arguments(parser: argparse.ArgumentParser):
+    """Add mapping scope filter options to a command-line parser"""
+    group = parser.add_argument_group('scope filters')
+    group.add_argument('--team', dest='teams', action='append', metavar='SLUG',
+                       help='only map this team (repeatable)')
+    group.add_argument('--repo', dest='repo_pattern', metavar='PATTERN',
+                       help="repository name glob, or 're:<regex>'")
+    group.add_argument('--topic', dest='topics', action='append', metavar='TOPIC',
+                       help='only map repositories with this topic (repeatable)')
+    group.add_argument('--visibility', choices=['public', 'private', 'internal'],
+                       help='only map repositories with this visibility')
+    archived = group.add_mutually_exclusive_group()
+    archived.add_argument('--exclude-archived', dest='archived', action='store_const', const=False,
+                          help='skip archived repositories')
+    archived.add_argument('--only-archived', dest='archived', action='store_const', const=True,
+                          help='only map archived repositories')
+    group.add_argument('--updated-since', metavar='DATE',
+                       help='only map repositories updated on or after this ISO date')
+
+
+def scope_from_args(args: argparse.Namespace):
+    """Build a MappingScope from parsed command-line options (None if no filter is set)"""
+    from github_team_repo_mapper import MappingScope
+
+    try:
+        scope = MappingScope(
+            team_slugs=args.teams,
+            repo_pattern=args.repo_pattern,
+            topics=args.topics,
+            visibility=args.visibility,
+            archived=args.archived,
+            updated_since=args.updated_since
+        )
+    except (ValueError, re.error) as e:
+        raise UsageError(f"Invalid filter: {e}")
+    return None if scope.is_empty else scope
+
+
+def _check_export_dependencies(args: argparse.Namespace):
+    """Fail before any long-running work if Parquet/Arrow output can't be written"""
+    import importlib.util
+    if (args.parquet or args.arrow) and importlib.util.find_spec('pyarrow') is None:
+        raise UsageError("Parquet/Arrow export requires pyarrow: pip3 install pyarrow")
+
+
+def _export_analytics_formats(source, args: argparse.Namespace) -> dict:
+    """Write the Parquet/Arrow tables and CSV role matrix requested on the command line"""
+    from columnar_export import export_mapping_to_columnar, export_role_matrix_csv
+
+    files = {}
+    if args.parquet:
+        files['parquet'] = export_mapping_to_columnar(source, args.parquet, 'parquet')
+    if args.arrow:
+        files['arrow'] = export_mapping_to_columnar(source, args.arrow, 'arrow')
+    if args.csv_matrix:
+        export_role_matrix_csv(source, args.csv_matrix)
+        files['csv_matrix'] = args.csv_matrix
+    return files
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+
+def cmd_map(args: argparse.Namespace, out: Output) -> int:
+    """Generate a (optionally scoped) mapping"""
+    _credentials()
+    from github_team_repo_mapper import GitHubAPIError
+
+    scope = scope_from_args(args)
+    _check_export_dependencies(args)
+    mapper = _mapper(args, out)
+    output = args.output or f"team_repo_mapping_{mapper.org}.json"
+
+    with out.human_output():
+        try:
+            if args.out_of_core:
+                source = mapper.generate_team_repo_mapping_to_disk(args.out_of_core, scope)
+            else:
+                source = mapper.generate_complete_team_repo_mapping(scope)
+        except GitHubAPIError as e:
+            partial = None
+            if isinstance(e.partial_result, dict):
+                partial = output[:-5] + '_partial.json' if output.endswith('.json') else output + '.partial'
+                mapper.export_mapping_to_json(e.partial_result, partial)
+            elif args.out_of_core:
+                partial = args.out_of_core
+            out.message(f"❌ Error: {e}")
+            out.result(ok=False, error=str(e), status_code=e.status_code, partial_output=partial)
+            return EXIT_API_ERROR
+
+        if args.report_format != 'none':
+            from reporting import write_report
+            with _span(args, 'report'):
+                write_report(source, args.report_format, sys.stdout)
+        with _span(args, 'export'):
+            if args.out_of_core:
+                source.export_json(output)
+                summary = source.summary()
+            else:
+                mapper.export_mapping_to_json(source, output)
+                summary = source['summary']
+            files = _export_analytics_formats(source, args)
+
+    out.result(ok=True, output=output, summary=summary, exports=files)
+    return EXIT_OK
+
+
+def cmd_overview(args: argparse.Namespace, out: Output) -> int:
+    """Count teams and repositories (no permission checks)"""
+    _credentials()
+    scope = scope_from_args(args)
+    mapper = _mapper(args, out)
+    with out.human_output():
+        repos = mapper.list_organization_repositories(scope)
+        teams = mapper.list_organization_teams(scope)
+
+    out.message(f"📊 {mapper.org}: {len(repos)} repositories, {len(teams)} teams")
+    for repo in repos[:args.limit]:
+        out.message(f"   {'🔒' if repo.private else '🔓'} {repo.full_name}")
+    for team in teams[:args.limit]:
+        out.message(f"   👥 {team.slug} ({team.members_count} members)")
+    out.result(
+        ok=True,
+        organization=mapper.org,
+        repositories=len(repos),
+        teams=len(teams),
+        sample_repositories=[repo.name for repo in repos[:args.limit]],
+        sample_teams=[team.slug for team in teams[:args.limit]]
+    )
+    return EXIT_OK
+
+
+def cmd_assign(args: argparse.Namespace, out: Output) -> int:
+    """Validate and apply a bulk assignment CSV"""
+    from assignment_csv import AssignmentCSVError, ingest_assignment_csv
+
+    if not args.dry_run and not args.yes:
+        raise UsageError("Refusing to change permissions without --yes (use --dry-run to only validate)")
+    if args.offline and not args.dry_run:
+        raise UsageError("--offline is only allowed with --dry-run")
+    if not os.path.isfile(args.csv):
+        raise UsageError(f"CSV file not found: {args.csv}")
+
+    index = None
+    mapper = None
+    if not args.offline:
+        from assignment_csv import OrgIndex
+        mapper = _mapper(args, out)
+        with out.human_output():
+            index = OrgIndex.from_mapper(mapper)
+
+    try:
+        ingested = ingest_assignment_csv(args.csv, index, args.policy, args.errors)
+    except AssignmentCSVError as e:
+        raise UsageError(str(e))
+
+    validation = {
+        'rows': ingested.total_rows,
+        'assignments': len(ingested),
+        'duplicates': ingested.duplicates,
+        'conflicts': ingested.conflicts,
+        'rejected': ingested.rejected,
+        'error_file': ingested.error_file,
+    }
+    out.event('validated', **validation)
+    out.message(f"✅ {ingested.total_rows} rows: {len(ingested)} assignments, "
+                f"{ingested.duplicates} duplicates merged, {ingested.rejected} rejected")
+    if ingested.error_file:
+        out.message(f"   Rejected rows written to {ingested.error_file}")
+
+    if args.dry_run:
+        out.result(ok=ingested.rejected == 0, dry_run=True, validation=validation)
+        return EXIT_PARTIAL if ingested.rejected else EXIT_OK
+
+    with out.human_output():
+        results = mapper.bulk_assign_permissions(ingested)
+    failed = [d for d in results['details'] if not d['success']]
+    out.result(ok=not failed and not ingested.rejected, validation=validation,
+               successful=results['successful'], failed=results['failed'], failures=failed)
+    return EXIT_PARTIAL if failed or ingested.rejected else EXIT_OK
+
+
+def cmd_diff(args: argparse.Namespace, out: Output) -> int:
+    """Compare the access grants of two saved mappings"""
+    from reporting import diff_mappings, render_diff
+
+    with _span(args, 'load_mappings'):
+        old, new = _load_mapping(args.old), _load_mapping(args.new)
+    with _span(args, 'diff'):
+        diff = diff_mappings(old, new)
+    counts = {key: len(value) for key, value in diff.items()}
+    if out.json_mode:
+        out.result(ok=True, **counts, changes=diff)
+    else:
+        print(render_diff(diff, args.format))
+    return EXIT_DIFFERENCES if any(counts.values()) else EXIT_OK
+
+
+def cmd_export(args: argparse.Namespace, out: Output) -> int:
+    """Convert a saved mapping or out-of-core store to other formats"""
+    if not (args.parquet or args.arrow or args.csv_matrix or args.json_output):
+        raise UsageError("Choose at least one of --parquet, --arrow, --csv-matrix or --json-output")
+    _check_export_dependencies(args)
+    source = _load_mapping(args.mapping)
+
+    with out.human_output():
+        files = _export_analytics_formats(source, args)
+        if args.json_output:
+            if isinstance(source, dict):
+                with open(args.json_output, 'w') as f:
+                    json.dump(source, f, indent=2, ensure_ascii=False)
+            else:
+                source.export_json(args.json_output)
+            files['json'] = args.json_output
+    out.result(ok=True, exports=files)
+    return EXIT_OK
+
+
+def cmd_report(args: argparse.Namespace, out: Output) -> int:
+    """Render an aggregated report from a saved mapping"""
+    from reporting import ReportOptions, write_report
+
+    with _span(args, 'load_mapping'):
+        source = _load_mapping(args.mapping)
+    options = ReportOptions(
+        teams=args.teams,
+        repo_pattern=args.repo_pattern,
+        roles=args.roles,
+        top=args.top,
+        admin_threshold=args.admin_threshold,
+        page=args.page,
+        page_size=args.page_size
+    )
+    with _span(args, 'report'):
+        if args.output:
+            with open(args.output, 'w', buffering=1 << 20) as f:
+                write_report(source, args.format, f, options)
+        else:
+            write_report(source, args.format, sys.stderr if out.json_mode else sys.stdout, options)
+    out.result(ok=True, output=args.output)
+    return EXIT_OK
+
+
+def run_profiled(args: argparse.Namespace, out: Output) -> int:
+    """Run the command with tracing (and an optional profiler), then report where the time went"""
+    from profiling import profile_run
+
+    with profile_run(args.profile, args.profiler) as tracer:
+        args.tracer = tracer
+        with tracer.span(f'cli.{args.command}', 'command'):
+            code = args.func(args, out)
+    if not out.quiet:
+        print(f"\n⏱️  Profile of '{args.command}' (trace: {', '.join(tracer.files)})", file=sys.stderr)
+        print(tracer.render_breakdown(), file=sys.stderr)
+    out.event('profile', spans=tracer.breakdown(), files=tracer.files)
+    return code
+
+
+# ----------------------------------------------------------------------
+# Parser
+# ----------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--json', action='store_true',
+                        help='write JSON-lines progress events and a final result to stdout')
+    common.add_argument('-q', '--quiet', action='store_true', help='suppress human-readable output')
+    common.add_argument('--profile', nargs='?', const='profile_trace.json', metavar='TRACE_FILE',
+                        help='trace phases and API requests to a Chrome trace file '
+                             '(default: profile_trace.json) and print a wall/CPU breakdown')
+    common.add_argument('--profiler', choices=['sample', 'cprofile'],
+                        help='with --profile: also run a sampling profiler (<trace>.folded) '
+                             'or cProfile (<trace>.prof)')
+
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='GitHub Team-Repository Mapping Tool (non-interactive)',
+        epilog='Credentials come from GITHUB_TOKEN and GITHUB_ORG. '
+               'Exit codes: 0 ok, 1 error, 2 usage, 3 API error, 4 partial, 5 differences.'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    def add_export_arguments(sub):
+        sub.add_argument('--parquet', metavar='DIR', help='write edges/teams/repos Parquet tables to DIR')
+        sub.add_argument('--arrow', metavar='DIR', help='write edges/teams/repos Arrow IPC tables to DIR')
+        sub.add_argument('--csv-matrix', metavar='FILE', help='write a team × repository role matrix CSV')
+
+    sub = subparsers.add_parser('map', parents=[common], help='generate a team-repository mapping')
+    add_scope_arguments(sub)
+    sub.add_argument('-o', '--output', metavar='FILE', help='JSON output file')
+    sub.add_argument('--out-of-core', metavar='DIR',
+                     help='keep access grants in an on-disk edge store in DIR (for very large organizations)')
+    sub.add_argument('--report-format', choices=['text', 'markdown', 'json', 'none'], default='text',
+                     help='summary report printed after mapping (default: text)')
+    add_export_arguments(sub)
+    sub.set_defaults(func=cmd_map)
+
+    sub = subparsers.add_parser('overview', parents=[common], help='count teams and repositories')
+    add_scope_arguments(sub)
+    sub.add_argument('--limit', type=int, default=5, help='teams and repositories to list')
+    sub.set_defaults(func=cmd_overview)
+
+    sub = subparsers.add_parser('assign', parents=[common], help='validate and apply a bulk assignment CSV')
+    sub.add_argument('csv', help='CSV with team_slug, repo_owner, repo_name, permission')
+    sub.add_argument('--policy', choices=['last', 'max'], default='last',
+                     help='for repeated team/repository rows: last row or highest permission wins')
+    sub.add_argument('--errors', metavar='FILE', help='rejected rows file (default: <csv>_errors.csv)')
+    sub.add_argument('--dry-run', action='store_true', help='validate only, change nothing')
+    sub.add_argument('--offline', action='store_true',
+                     help='with --dry-run: skip checking teams/repositories against the organization')
+    sub.add_argument('-y', '--yes', action='store_true', help='apply without confirmation')
+    sub.set_defaults(func=cmd_assign)
+
+    sub = subparsers.add_parser('diff', parents=[common], help='compare two saved mappings')
+    sub.add_argument('old', help='older mapping JSON file or store directory')
+    sub.add_argument('new', help='newer mapping JSON file or store directory')
+    sub.add_argument('--format', choices=['text', 'markdown', 'json'], default='text')
+    sub.set_defaults(func=cmd_diff)
+
+    sub = subparsers.add_parser('export', parents=[common], help='convert a saved mapping to other formats')
+    sub.add_argument('mapping', help='mapping JSON file, or out-of-core store directory')
+    add_export_arguments(sub)
+    sub.add_argument('--json-output', metavar='FILE', help='write the mapping as JSON')
+    sub.set_defaults(func=cmd_export)
+
+    sub = subparsers.add_parser('report', parents=[common], help='summarize a saved mapping')
+    sub.add_argument('mapping', help='mapping JSON file, or out-of-core store directory')
+    sub.add_argument('--format', choices=['text', 'markdown', 'json'], default='text')
+    sub.add_argument('--team', dest='teams', action='append', metavar='SLUG',
+                     help='only count grants of this team (repeatable)')
+    sub.add_argument('--repo', dest='repo_pattern', metavar='PATTERN',
+                     help="only count grants on matching repositories (glob, or 're:<regex>')")
+    sub.add_argument('--role', dest='roles', action='append', metavar='ROLE',
+                     help='only count grants with this role (repeatable)')
+    sub.add_argument('--top', type=int, default=10, help='entries in top-N lists')
+    sub.add_argument('--admin-threshold', type=int, default=10,
+                     help='admin grants that flag a team for admin sprawl')
+    sub.add_argument('--page', type=int, default=1, help='page of the long lists')
+    sub.add_argument('--page-size', type=int, default=50, help='entries per page')
+    sub.add_argument('-o', '--output', metavar='FILE', help='write the report to FILE')
+    sub.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None) -> int:
+    """Parse arguments, run the command and return its exit code"""
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit as e:
+        # argparse exits with 2 on bad arguments and 0 for --help
+        return e.code if isinstance(e.code, int) else EXIT_USAGE
+
+    out = Output(args.json, args.quiet)
+    args.tracer = None
+    try:
+        if args.profiler and not args.profile:
+            raise UsageError("--profiler requires --profile")
+        code = run_profiled(args, out) if args.profile else args.func(args, out)
+    except UsageError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        out.result(ok=False, error=str(e))
+        code = EXIT_USAGE
+    except KeyboardInterrupt:
+        print("\n⚠️  Operation cancelled by user", file=sys.stderr)
+        out.result(ok=False, error='interrupted')
+        code = EXIT_INTERRUPTED
+    except Exception as e:
+        # Keep API failures distinguishable from other errors. The mapper is
+        # only imported by commands that call the API, so if it isn't loaded
+        # this can't be an API error.
+        mapper_module = sys.modules.get('github_team_repo_mapper')
+        if mapper_module is not None and isinstance(e, mapper_module.GitHubAPIError):
+            code = EXIT_API_ERROR
+        else:
+            code = EXIT_ERROR
+        print(f"❌ {e}", file=sys.stderr)
+        out.result(ok=False, error=str(e))
+    out.finish()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
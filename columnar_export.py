@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Columnar Exports for Analytics
+
+Writes a team-repository mapping as tables that analytics tools load fast:
+
+    edges   team_id, repo_id, role (dictionary-encoded)
+    teams   one row per team (team_id, slug, name, ...)
+    repos   one row per repository (repo_id, name, full_name, ...)
+
+as Parquet or Arrow IPC files, plus an optional wide team × repository CSV
+role matrix. Tables are written incrementally in row groups (record batches)
+so a full mapping is never materialized a second time. Edges are written in
+team order, which keeps per-row-group team_id statistics tight for
+predicate pushdown.
+
+Sources can be the mapping dict returned by
+GitHubTeamRepoMapper.generate_complete_team_repo_mapping or an EdgeStore.
+
+Parquet/Arrow output requires pyarrow (pip3 install pyarrow); the CSV matrix
+does not.
+"""
+
+import csv
+import os
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from edge_store import EdgeStore
+
+# Rows per row group / record batch
+ROW_GROUP_SIZE = 1_000_000
+
+FORMAT_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+Source = Union[Dict, EdgeStore]
+
+
+def _import_pyarrow():
+    """Import pyarrow, with an actionable message when it is missing"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow export requires pyarrow: pip3 install pyarrow") from e
+    return pyarrow
+
+
+def _role_names(source: Source) -> List[str]:
+    """Distinct role names, in a stable order, for the role dictionary"""
+    if isinstance(source, EdgeStore):
+        roles = (role['role_name'] for role in source.meta['roles'])
+    else:
+        roles = (perm['role_name'] for perm in source['permissions_matrix'])
+    return list(dict.fromkeys(roles))
+
+
+def _iter_edges(source: Source, role_index: Dict[str, int]) -> Iterator[Tuple[int, int, int]]:
+    """Yield (team_id, repo_id, role code) in team order"""
+    if isinstance(source, EdgeStore):
+        team_ids = [team['id'] for team in source.iter_teams()]
+        repo_ids = [repo['id'] for repo in source.iter_repositories()]
+        codes = [role_index[role['role_name']] for role in source.meta['roles']]
+        for team_index, repo_index, code in source.iter_edges():
+            yield team_ids[team_index], repo_ids[repo_index], codes[code]
+        return
+
+    repositories = source['repositories']
+    for team_data in source['teams'].values():
+        for access in team_data['repositories_with_access']:
+            yield team_data['id'], repositories[access['repo_name']]['id'], role_index[access['role_name']]
+
+
+def _iter_teams(source: Source) -> Iterator[Dict]:
+    if isinstance(source, EdgeStore):
+        yield from source.iter_teams()
+    else:
+        yield from source['teams'].values()
+
+
+def _iter_repositories(source: Source) -> Iterator[Dict]:
+    if isinstance(source, EdgeStore):
+        yield from source.iter_repositories()
+    else:
+        for name, repo_data in source['repositories'].items():
+            yield dict(repo_data, name=name)
+
+
+class _TableWriter:
+    """Buffer rows column-wise and flush them as row groups / record batches"""
+
+    def __init__(self, pa, path: str, schema, fmt: str, row_group_size: int,
+                 dictionaries: Optional[Dict] = None):
+        self.pa = pa
+        self.schema = schema
+        self.dictionaries = dictionaries or {}
+        self.row_group_size = row_group_size
+        self.columns: List[list] = [[] for _ in schema]
+        self.rows = 0
+        if fmt == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(path, schema, use_dictionary=True, compression='snappy')
+            self._write = lambda batch: self.writer.write_table(
+                pa.Table.from_batches([batch]), row_group_size=row_group_size
+            )
+        else:
+            self.writer = pa.ipc.new_file(path, schema)
+            self._write = self.writer.write_batch
+
+    def append(self, row: tuple):
+        for column, value in zip(self.columns, row):
+            column.append(value)
+        self.rows += 1
+        if len(self.columns[0]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.columns[0]:
+            return
+        arrays = []
+        for field, values in zip(self.schema, self.columns):
+            if self.pa.types.is_dictionary(field.type):
+                # Values are codes into a fixed dictionary, identical for every batch
+                arrays.append(self.pa.DictionaryArray.from_arrays(
+                    self.pa.array(values, type=field.type.index_type), self.dictionaries[field.name]
+                ))
+            else:
+                arrays.append(self.pa.array(values, type=field.type))
+        self._write(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.columns = [[] for _ in self.schema]
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def export_mapping_to_columnar(source: Source, out_dir: str, fmt: str = 'parquet',
+                               row_group_size: int = ROW_GROUP_SIZE) -> Dict[str, str]:
+    """
+    Export edges, teams and repos tables as Parquet or Arrow IPC files
+
+    Args:
+        source: Mapping dict or EdgeStore
+        out_dir: Output directory (created if needed)
+        fmt: 'parquet' or 'arrow'
+        row_group_size: Rows per row group / record batch
+
+    Returns:
+        Dictionary of table name to written file path
+    """
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown columnar format '{fmt}' (expected parquet or arrow)")
+    pa = _import_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, name + FORMAT_EXTENSIONS[fmt]) for name in ('edges', 'teams', 'repos')}
+
+    role_names = _role_names(source)
+    role_index = {name: code for code, name in enumerate(role_names)}
+
+    edges = _TableWriter(pa, paths['edges'], pa.schema([
+        ('team_id', pa.int64()),
+        ('repo_id', pa.int64()),
+        ('role', pa.dictionary(pa.int16(), pa.string())),
+    ]), fmt, row_group_size, dictionaries={'role': pa.array(role_names, type=pa.string())})
+    try:
+        for edge in _iter_edges(source, role_index):
+            edges.append(edge)
+    finally:
+        edges.close()
+
+    teams = _TableWriter(pa, paths['teams'], pa.schema([
+        ('team_id', pa.int64()),
+        ('slug', pa.string()),
+        ('name', pa.string()),
+        ('description', pa.string()),
+        ('privacy', pa.string()),
+        ('default_permission', pa.string()),
+        ('members_count', pa.int64()),
+        ('repos_count', pa.int64()),
+    ]), fmt, row_group_size)
+    try:
+        for team in _iter_teams(source):
+            teams.append((team['id'], team['slug'], team['name'], team['description'], team['privacy'],
+                          team['default_permission'], team['members_count'], team['repos_count']))
+    finally:
+        teams.close()
+
+    repos = _TableWriter(pa, paths['repos'], pa.schema([
+        ('repo_id', pa.int64()),
+        ('name', pa.string()),
+        ('full_name', pa.string()),
+        ('private', pa.bool_()),
+        ('description', pa.string()),
+        ('default_branch', pa.string()),
+    ]), fmt, row_group_size)
+    try:
+        for repo in _iter_repositories(source):
+            repos.append((repo['id'], repo['name'], repo['full_name'], repo['private'],
+                          repo['description'], repo['default_branch']))
+    finally:
+        repos.close()
+
+    print(f"📦 Exported {edges.rows} edges, {teams.rows} teams and {repos.rows} repositories "
+          f"as {fmt} to {out_dir}")
+    return paths
+
+
+def export_role_matrix_csv(source: Source, filename: str):
+    """
+    Export a wide team × repository CSV with the role name in each cell
+
+    One row per team (team_slug first), one column per repository; cells are
+    empty where the team has no access. Rows are written one team at a time.
+    """
+    repo_names = [repo['name'] for repo in _iter_repositories(source)]
+
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['team_slug'] + repo_names)
+
+        if isinstance(source, EdgeStore):
+            roles = [role['role_name'] for role in source.meta['roles']]
+            edges = source.iter_edges()
+            edge = next(edges, None)
+            for team_index, slug in enumerate(source.team_names):
+                row = [''] * len(repo_names)
+                while edge is not None and edge[0] == team_index:
+                    row[edge[1]] = roles[edge[2]]
+                    edge = next(edges, None)
+                writer.writerow([slug] + row)
+        else:
+            column = {name: i for i, name in enumerate(repo_names)}
+            for slug, team_data in source['teams'].items():
+                row = [''] * len(repo_names)
+                for access in team_data['repositories_with_access']:
+                    row[column[access['repo_name']]] = access['role_name']
+                writer.writerow([slug] + row)
+
+    print(f"📄 Role matrix exported to {filename}")
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+Sharded Team-Repository Mapping
+
+Splits a mapping run into shards and spreads them over several worker
+processes, so large organizations can use more than one token and core.
+
+1. plan:  list teams and repositories once, then queue one shard per team
+          and repository page in a SQLite work queue
+2. work:  worker processes claim shards with a lease, check permissions and
+          store partial results; shards whose lease expires (crashed or
+          stalled workers) are handed out again automatically
+3. merge: combine all partial results into the same mapping structure that
+          GitHubTeamRepoMapper.generate_complete_team_repo_mapping returns
+
+The queue uses SQLite's rollback journal by default, so workers on other
+hosts can share the queue file, as long as it lives on a filesystem whose
+POSIX (fcntl) locks work across hosts (e.g. NFSv4 with locking enabled; many
+SMB and FUSE mounts do not qualify). `plan --wal` switches the queue to WAL
+mode, which is faster under contention but keeps its index in shared memory:
+only use it when every worker runs on the same host.
+
+Usage:
+    python3 distributed_mapper.py plan --db mapping.db [scope filters]
+    python3 distributed_mapper.py work --db mapping.db --workers 4
+    python3 distributed_mapper.py merge --db mapping.db -o mapping.json
+    python3 distributed_mapper.py status --db mapping.db
+    python3 distributed_mapper.py run --db mapping.db --workers 4   # all three
+
+Set GITHUB_TOKENS to a comma-separated list to give workers different tokens
+(assigned round-robin); otherwise every worker uses GITHUB_TOKEN.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_team_repo_mapper import GitHubTeamRepoMapper, MappingScope, Repository, Team, TeamRepoPermission
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    team_index INTEGER NOT NULL,
+    repo_start INTEGER NOT NULL,
+    repo_end INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_expires);
+"""
+
+
+@dataclass
+class Shard:
+    """One unit of work: a team checked against a page of repositories"""
+    id: int
+    team_index: int
+    repo_start: int
+    repo_end: int
+    attempts: int
+
+
+class ShardQueue:
+    """
+    Durable SQLite-backed shard queue with leases
+
+    A shard is 'pending' until a worker claims it, 'leased' while a worker
+    holds an unexpired lease, then 'done' or 'failed'. A leased shard whose
+    lease has expired can be claimed again by any worker; after max_attempts
+    claims it is marked 'failed' instead.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3,
+                 wal: Optional[bool] = None):
+        """
+        Open (and create if needed) a shard queue
+
+        Args:
+            path: SQLite database file
+            lease_seconds: How long a claim lasts without being renewed
+            max_attempts: Claims allowed per shard before it is marked failed
+            wal: Switch the database to WAL (True) or the rollback journal
+                (False); None keeps its current mode. The mode is stored in
+                the file, so it only needs setting by whoever plans the run.
+                WAL only works when every connection is on the same host.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        if wal is not None:
+            self.conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def journal_mode(self) -> str:
+        return self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block inside a write-locked transaction"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def get_meta(self, key: str):
+        """Return a JSON value stored by plan(), or None"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def plan(self, org: str, repositories: List[Repository], teams: List[Team],
+             scope: Optional[MappingScope] = None, repos_per_shard: int = 100) -> int:
+        """
+        Replace the queue contents with shards for a new mapping run
+
+        Shards are created team by team, so merging in shard order reproduces
+        the ordering of a single-process run.
+
+        Returns:
+            Number of shards queued
+        """
+        with self._transaction():
+            self.conn.execute("DELETE FROM meta")
+            self.conn.execute("DELETE FROM shards")
+            meta = {
+                'organization': org,
+                'scope': scope.to_dict() if scope is not None else None,
+                'repositories': [asdict(repo) for repo in repositories],
+                'teams': [asdict(team) for team in teams],
+            }
+            self.conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in meta.items()]
+            )
+            rows = [
+                (team_index, start, min(start + repos_per_shard, len(repositories)))
+                for team_index in range(len(teams))
+                for start in range(0, len(repositories), repos_per_shard)
+            ]
+            self.conn.executemany(
+                "INSERT INTO shards (team_index, repo_start, repo_end) VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def claim(self, worker_id: str) -> Optional[Shard]:
+        """Claim the next pending or expired shard, or return None if there is none"""
+        while True:
+            with self._transaction():
+                now = time.time()
+                row = self.conn.execute(
+                    "SELECT id, team_index, repo_start, repo_end, attempts FROM shards "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1", (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                shard = Shard(*row)
+                if shard.attempts >= self.max_attempts:
+                    self.conn.execute(
+                        "UPDATE shards SET status = 'failed', lease_owner = NULL, "
+                        "error = COALESCE(error, 'lease expired') WHERE id = ?", (shard.id,)
+                    )
+                    continue
+                self.conn.execute(
+                    "UPDATE shards SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, shard.id)
+                )
+                shard.attempts += 1
+                return shard
+
+    def renew(self, shard_id: int, worker_id: str) -> bool:
+        """Extend a lease; returns False if the lease was lost to another worker"""
+        cursor = self.conn.execute(
+            "UPDATE shards SET lease_expires = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, shard_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, shard_id: int, worker_id: str, result: Dict) -> bool:
+        """Store a shard's partial result; ignored if the lease was lost"""
+        cursor = self.conn.execute(
+            "UPDATE shards SET status = 'done', result = ?, lease_owner = NULL, error = NULL "
+            "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (json.dumps(result), shard_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, shard_id: int, worker_id: str, error: str):
+        """Release a shard after an error so it is retried (or failed for good)"""
+        self.conn.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_owner = NULL, error = ? WHERE id = ? AND lease_owner = ?",
+            (self.max_attempts, error, shard_id, worker_id)
+        )
+
+    def reset_failed(self) -> int:
+        """Put failed shards back in the queue with a fresh attempt budget"""
+        cursor = self.conn.execute(
+            "UPDATE shards SET status = 'pending', attempts = 0, error = NULL WHERE status = 'failed'"
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of shards in each status"""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for status, count in self.conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def has_unfinished(self) -> bool:
+        """True while any shard is pending or leased"""
+        counts = self.counts()
+        return counts['pending'] + counts['leased'] > 0
+
+
+class LeaseHeartbeat:
+    """
+    Keeps a shard lease alive from a background thread
+
+    A single permission check can block for much longer than the lease
+    (rate-limit waits of up to an hour), so the lease is renewed on a timer
+    rather than between checks. If a renewal finds the lease taken over by
+    another worker, `lost` is set and the worker should abandon the shard.
+    """
+
+    def __init__(self, db_path: str, shard_id: int, worker_id: str, lease_seconds: float,
+                 interval: Optional[float] = None):
+        """
+        Args:
+            db_path: Shard queue database file
+            shard_id: Shard whose lease to keep
+            worker_id: Worker holding the lease
+            lease_seconds: Lease length each renewal grants
+            interval: Seconds between renewals (default: a third of the lease)
+        """
+        self.db_path = db_path
+        self.shard_id = shard_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval if interval is not None else lease_seconds / 3
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'lease-{shard_id}', daemon=True)
+
+    def _run(self):
+        # SQLite connections can't be shared between threads
+        queue = ShardQueue(self.db_path, lease_seconds=self.lease_seconds)
+        try:
+            while not self._stop.wait(self.interval):
+                if not queue.renew(self.shard_id, self.worker_id):
+                    self.lost.set()
+                    return
+        finally:
+            queue.close()
+
+    def __enter__(self) -> 'LeaseHeartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def plan_mapping(mapper: GitHubTeamRepoMapper, queue: ShardQueue,
+                 scope: Optional[MappingScope] = None, repos_per_shard: int = 100) -> int:
+    """List teams and repositories once and queue the permission-check shards"""
+    if scope is not None and scope.is_empty:
+        scope = None
+    repositories = mapper.list_organization_repositories(scope)
+    teams = mapper.list_organization_teams(scope)
+    shard_count = queue.plan(mapper.org, repositories, teams, scope, repos_per_shard)
+    print(f"🗂️  Queued {shard_count} shards ({len(teams)} teams × {len(repositories)} repositories)")
+    return shard_count
+
+
+def run_worker(db_path: str, token: str, worker_id: Optional[str] = None,
+               lease_seconds: float = 300, poll_interval: float = 5.0) -> int:
+    """
+    Claim and process shards until the queue is drained
+
+    Returns:
+        Number of shards completed by this worker
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    queue = ShardQueue(db_path, lease_seconds=lease_seconds)
+    repositories = [Repository(**repo) for repo in queue.get_meta('repositories') or []]
+    teams = [Team(**team) for team in queue.get_meta('teams') or []]
+    mapper = GitHubTeamRepoMapper(token, queue.get_meta('organization'))
+    completed = 0
+
+    try:
+        while True:
+            shard = queue.claim(worker_id)
+            if shard is None:
+                if not queue.has_unfinished():
+                    break
+                # Other workers still hold leases; wait in case one expires
+                time.sleep(poll_interval)
+                continue
+
+            team = teams[shard.team_index]
+            print(f"  🔧 [{worker_id}] {team.slug}: repositories {shard.repo_start}-{shard.repo_end - 1}")
+            result = {}
+            try:
+                with LeaseHeartbeat(db_path, shard.id, worker_id, lease_seconds) as heartbeat:
+                    for repo in repositories[shard.repo_start:shard.repo_end]:
+                        permission = mapper._check_team_repository_permissions(team.slug, repo.owner, repo.name)
+                        if permission:
+                            result[repo.name] = asdict(permission)
+                        if heartbeat.lost.is_set():
+                            raise RuntimeError("lease lost")
+                        # Small delay to be respectful of rate limits
+                        time.sleep(0.1)
+            except Exception as e:
+                print(f"  ❌ [{worker_id}] shard {shard.id} failed: {e}")
+                queue.fail(shard.id, worker_id, str(e) or type(e).__name__)
+                continue
+
+            if queue.complete(shard.id, worker_id, result):
+                completed += 1
+    finally:
+        queue.close()
+
+    print(f"✅ [{worker_id}] finished {completed} shards")
+    return completed
+
+
+def _worker_process(db_path: str, token: str, lease_seconds: float):
+    """multiprocessing entry point"""
+    run_worker(db_path, token, lease_seconds=lease_seconds)
+
+
+def run_workers(db_path: str, tokens: List[str], workers: int, lease_seconds: float = 300):
+    """Run several local worker processes, assigning tokens round-robin"""
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(db_path, tokens[i % len(tokens)], lease_seconds),
+            name=f"mapper-worker-{i}"
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def merge_results(queue: ShardQueue) -> Dict:
+    """
+    Merge partial shard results into a complete mapping
+
+    Raises:
+        RuntimeError: If any shard is not done yet
+    """
+    counts = queue.counts()
+    if counts['done'] != sum(counts.values()):
+        raise RuntimeError(f"Cannot merge: shards not finished ({counts})")
+
+    repositories = [Repository(**repo) for repo in queue.get_meta('repositories')]
+    teams = [Team(**team) for team in queue.get_meta('teams')]
+    scope_data = queue.get_meta('scope')
+    scope = MappingScope(**scope_data) if scope_data else None
+
+    mapper = GitHubTeamRepoMapper('', queue.get_meta('organization'))
+    mapping = mapper._new_mapping(repositories, teams, scope)
+    rows = queue.conn.execute(
+        "SELECT team_index, repo_start, repo_end, result FROM shards ORDER BY id"
+    )
+    for team_index, repo_start, repo_end, result in rows:
+        team = teams[team_index]
+        granted = json.loads(result)
+        for repo in repositories[repo_start:repo_end]:
+            permission = granted.get(repo.name)
+            mapper._record_permission(
+                mapping, team, repo,
+                TeamRepoPermission(**permission) if permission else None
+            )
+
+    print(f"✅ Merged {mapping['summary']['total_access_granted']} access grants "
+          f"from {counts['done']} shards")
+    return mapping
+
+
+def _tokens_from_env() -> List[str]:
+    """Return worker tokens from GITHUB_TOKENS, falling back to GITHUB_TOKEN"""
+    tokens = [t.strip() for t in os.getenv('GITHUB_TOKENS', '').split(',') if t.strip()]
+    if not tokens and os.getenv('GITHUB_TOKEN'):
+        tokens = [os.getenv('GITHUB_TOKEN')]
+    return tokens
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    from cli import add_scope_arguments
+
+    parser = argparse.ArgumentParser(description='Sharded team-repository mapping')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name: str, help_text: str) -> argparse.ArgumentParser:
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--db', default='mapping_queue.db', help='shard queue database file')
+        return sub
+
+    for name, help_text in (('plan', 'queue shards for a new run'),
+                            ('run', 'plan, work and merge in one go')):
+        sub = add_command(name, help_text)
+        add_scope_arguments(sub)
+        sub.add_argument('--repos-per-shard', type=int, default=100)
+        sub.add_argument('--wal', action='store_true',
+                         help='use SQLite WAL mode (faster; only when all workers run on this host)')
+    for name, help_text in (('work', 'process shards'), ('run', None)):
+        sub = subparsers.choices.get(name) or add_command(name, help_text)
+        sub.add_argument('--workers', type=int, default=1, help='local worker processes')
+        sub.add_argument('--lease-seconds', type=float, default=300)
+        sub.add_argument('--retry-failed', action='store_true', help='requeue failed shards first')
+    for name, help_text in (('merge', 'merge finished shards'), ('run', None)):
+        sub = subparsers.choices.get(name) or add_command(name, help_text)
+        sub.add_argument('-o', '--output', metavar='FILE', help='JSON output file')
+    add_command('status', 'show shard counts')
+    return parser
+
+
+def main():
+    """Command-line entry point"""
+    args = build_parser().parse_args()
+    # Planning a run sets the journal mode; other commands keep the file's
+    queue = ShardQueue(args.db, wal=args.wal if args.command in ('plan', 'run') else None)
+
+    if args.command in ('plan', 'run'):
+        from cli import scope_from_args
+        try:
+            scope = scope_from_args(args)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        tokens = _tokens_from_env()
+        if not tokens or not os.getenv('GITHUB_ORG'):
+            print("❌ Set GITHUB_TOKEN (or GITHUB_TOKENS) and GITHUB_ORG")
+            sys.exit(1)
+        mapper = GitHubTeamRepoMapper(tokens[0], os.getenv('GITHUB_ORG'))
+        plan_mapping(mapper, queue, scope, args.repos_per_shard)
+
+    if args.command in ('work', 'run'):
+        tokens = _tokens_from_env()
+        if not tokens:
+            print("❌ Set GITHUB_TOKEN (or GITHUB_TOKENS)")
+            sys.exit(1)
+        if args.retry_failed:
+            print(f"🔁 Requeued {queue.reset_failed()} failed shards")
+        run_workers(args.db, tokens, args.workers, args.lease_seconds)
+
+    if args.command in ('merge', 'run'):
+        try:
+            mapping = merge_results(queue)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        mapper = GitHubTeamRepoMapper('', mapping['organization'])
+        mapper.export_mapping_to_json(mapping, args.output)
+
+    if args.command == 'status':
+        counts = queue.counts()
+        print(f"📊 Shards: {sum(counts.values())} total, " +
+              ", ".join(f"{count} {status}" for status, count in counts.items()))
+
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Out-of-Core Team-Repository Edge Store
+
+For very large organizations the in-memory mapping dict built by
+GitHubTeamRepoMapper.generate_complete_team_repo_mapping does not fit in
+memory. An EdgeStore keeps the mapping on disk instead:
+
+    <dir>/meta.json      organization, scope, role table, counts
+    <dir>/teams.jsonl    one team per line (line number = team index)
+    <dir>/repos.jsonl    one repository per line (line number = repo index)
+    <dir>/edges.bin      fixed-width access grants: team index (uint32),
+                         repo index (uint32), role code (uint8)
+
+Reports, aggregates and the JSON export read edges.bin through mmap in
+streaming passes, so memory grows with the number of teams and repositories
+but not with the number of access grants.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+EDGE = struct.Struct('<IIB')
+EDGE_SIZE = EDGE.size
+PERMISSION_NAMES = ('admin', 'maintain', 'push', 'triage', 'pull')
+
+# Records are read and written in blocks of this many edges
+BLOCK_EDGES = 65536
+
+
+class EdgeStore:
+    """
+    On-disk team-repository mapping backed by a memory-mapped edge file
+
+    Use EdgeStore.create() while mapping, then EdgeStore.open() to read.
+    Each distinct (role name, permission level, permission flags) combination
+    gets a one-byte role code, so at most 256 distinct roles are supported.
+    """
+
+    def __init__(self, path: str, meta: Dict):
+        self.path = path
+        self.meta = meta
+        self._edges_file = None
+        self._teams_file = None
+        self._repos_file = None
+        self._role_codes: Dict[Tuple, int] = {}
+        self._team_names: Optional[List[str]] = None
+        self._repo_names: Optional[List[str]] = None
+        self._repo_full_names: Optional[List[str]] = None
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def create(cls, path: str, org: str, scope: Optional[Dict] = None) -> 'EdgeStore':
+        """Create an empty store in directory `path` (existing store files are replaced)"""
+        os.makedirs(path, exist_ok=True)
+        store = cls(path, {
+            'organization': org,
+            'generated_at': datetime.now().isoformat(),
+            'scope': scope,
+            'roles': [],
+            'total_repositories': 0,
+            'total_teams': 0,
+            'total_permissions_checked': 0,
+            'total_access_granted': 0,
+        })
+        store._edges_file = open(store._file('edges.bin'), 'wb', buffering=EDGE_SIZE * BLOCK_EDGES)
+        store._teams_file = open(store._file('teams.jsonl'), 'w')
+        store._repos_file = open(store._file('repos.jsonl'), 'w')
+        # meta.json is only written by close(), so an interrupted run can't
+        # leave new edges paired with an earlier run's metadata
+        for stale in ('edges_by_repo.bin', 'meta.json'):
+            if os.path.exists(store._file(stale)):
+                os.remove(store._file(stale))
+        return store
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def add_team(self, team_data: Dict) -> int:
+        """Append a team (mapping 'teams' entry without its access list); returns its index"""
+        self._teams_file.write(json.dumps(team_data) + '\n')
+        self.meta['total_teams'] += 1
+        return self.meta['total_teams'] - 1
+
+    def add_repository(self, repo_data: Dict) -> int:
+        """Append a repository (with 'name'); returns its index"""
+        self._repos_file.write(json.dumps(repo_data) + '\n')
+        self.meta['total_repositories'] += 1
+        return self.meta['total_repositories'] - 1
+
+    def _role_code(self, role_name: str, permission_level: str, permissions: Dict) -> int:
+        key = (role_name, permission_level) + tuple(bool(permissions.get(p)) for p in PERMISSION_NAMES)
+        code = self._role_codes.get(key)
+        if code is None:
+            code = len(self.meta['roles'])
+            if code > 255:
+                raise ValueError("EdgeStore supports at most 256 distinct roles")
+            self.meta['roles'].append({
+                'role_name': role_name,
+                'permission_level': permission_level,
+                'permissions': {p: bool(permissions.get(p)) for p in PERMISSION_NAMES},
+            })
+            self._role_codes[key] = code
+        return code
+
+    def record_check(self, team_index: int, repo_index: int, permission=None):
+        """
+        Record one permission check
+
+        Args:
+            team_index: Index returned by add_team
+            repo_index: Index returned by add_repository
+            permission: TeamRepoPermission, or None when the team has no access
+        """
+        self.meta['total_permissions_checked'] += 1
+        if permission is None:
+            return
+        code = self._role_code(permission.role_name, permission.permission_level, {
+            'admin': permission.has_admin,
+            'maintain': permission.has_maintain,
+            'push': permission.has_push,
+            'triage': permission.has_triage,
+            'pull': permission.has_pull
+        })
+        self._edges_file.write(EDGE.pack(team_index, repo_index, code))
+        self.meta['total_access_granted'] += 1
+
+    def close(self):
+        """Flush written data and write meta.json"""
+        for f in (self._edges_file, self._teams_file, self._repos_file):
+            if f is not None:
+                f.close()
+        if self._edges_file is not None:
+            with open(self._file('meta.json'), 'w') as f:
+                json.dump(self.meta, f, indent=2)
+            self._edges_file = self._teams_file = self._repos_file = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, path: str) -> 'EdgeStore':
+        """Open a completed store for reading"""
+        with open(os.path.join(path, 'meta.json')) as f:
+            return cls(path, json.load(f))
+
+    def iter_edges(self, by_repo: bool = False) -> Iterator[Tuple[int, int, int]]:
+        """
+        Stream (team index, repo index, role code) tuples from the edge file
+
+        Edges come in team-major order, or grouped by repository when by_repo
+        is True (the repository index is built on first use).
+        """
+        if by_repo:
+            self._ensure_repo_index()
+        name = self._file('edges_by_repo.bin' if by_repo else 'edges.bin')
+        if os.path.getsize(name) == 0:
+            return
+        block = EDGE_SIZE * BLOCK_EDGES
+        with open(name, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), block):
+                # Slicing copies one block, so memory stays bounded by the block size
+                yield from EDGE.iter_unpack(mapped[start:start + block])
+
+    def iter_teams(self) -> Iterator[Dict]:
+        """Stream team records in index order"""
+        with open(self._file('teams.jsonl')) as f:
+            for line in f:
+                yield json.loads(line)
+
+    def iter_repositories(self) -> Iterator[Dict]:
+        """Stream repository records in index order"""
+        with open(self._file('repos.jsonl')) as f:
+            for line in f:
+                yield json.loads(line)
+
+    @property
+    def team_names(self) -> List[str]:
+        """Team slugs by index"""
+        if self._team_names is None:
+            self._team_names = [team['slug'] for team in self.iter_teams()]
+        return self._team_names
+
+    @property
+    def repo_names(self) -> List[str]:
+        """Repository names by index"""
+        if self._repo_names is None:
+            self._repo_names = [repo['name'] for repo in self.iter_repositories()]
+        return self._repo_names
+
+    @property
+    def repo_full_names(self) -> List[str]:
+        """Repository full names by index"""
+        if self._repo_full_names is None:
+            self._repo_full_names = [repo['full_name'] for repo in self.iter_repositories()]
+        return self._repo_full_names
+
+    def _ensure_repo_index(self):
+        """Build edges_by_repo.bin with an on-disk counting sort by repository"""
+        target = self._file('edges_by_repo.bin')
+        size = os.path.getsize(self._file('edges.bin'))
+        if os.path.exists(target) and os.path.getsize(target) == size:
+            return
+
+        offsets = array('Q', bytes(8 * (self.meta['total_repositories'] + 1)))
+        for _, repo_index, _ in self.iter_edges():
+            offsets[repo_index + 1] += 1
+        for i in range(1, len(offsets)):
+            offsets[i] += offsets[i - 1]
+
+        with open(target, 'wb') as f:
+            f.truncate(size)
+        if size == 0:
+            return
+        with open(target, 'r+b') as f:
+            out = mmap.mmap(f.fileno(), size)
+            try:
+                for team_index, repo_index, code in self.iter_edges():
+                    EDGE.pack_into(out, offsets[repo_index] * EDGE_SIZE, team_index, repo_index, code)
+                    offsets[repo_index] += 1
+                out.flush()
+            finally:
+                out.close()
+
+    # ------------------------------------------------------------------
+    # Streaming aggregates
+    # ------------------------------------------------------------------
+
+    def team_grant_counts(self) -> array:
+        """Access grants per team index, computed in one pass"""
+        counts = array('Q', bytes(8 * self.meta['total_teams']))
+        for team_index, _, _ in self.iter_edges():
+            counts[team_index] += 1
+        return counts
+
+    def repo_grant_counts(self) -> array:
+        """Access grants per repository index, computed in one pass"""
+        counts = array('Q', bytes(8 * self.meta['total_repositories']))
+        for _, repo_index, _ in self.iter_edges():
+            counts[repo_index] += 1
+        return counts
+
+    def role_histogram(self) -> Dict[str, int]:
+        """Access grants per role name"""
+        counts = array('Q', bytes(8 * 256))
+        for _, _, code in self.iter_edges():
+            counts[code] += 1
+        histogram: Dict[str, int] = {}
+        for code, role in enumerate(self.meta['roles']):
+            histogram[role['role_name']] = histogram.get(role['role_name'], 0) + counts[code]
+        return histogram
+
+    def summary(self) -> Dict:
+        """Summary block in the same shape as the in-memory mapping's"""
+        summary = {
+            'total_repositories': self.meta['total_repositories'],
+            'total_teams': self.meta['total_teams'],
+            'total_permissions_checked': self.meta['total_permissions_checked'],
+            'total_access_granted': self.meta['total_access_granted'],
+        }
+        if self.meta.get('incomplete'):
+            summary['incomplete'] = True
+        return summary
+
+    # ------------------------------------------------------------------
+    # Reports and exports
+    # ------------------------------------------------------------------
+
+    def print_summary_report(self, out: Optional[TextIO] = None, fmt: str = 'text', options=None):
+        """Print the aggregated summary report (see reporting.build_report), streaming from disk"""
+        from reporting import write_report
+        write_report(self, fmt, out, options)
+
+    def export_json(self, filename: str):
+        """
+        Write the mapping as JSON in the same structure as export_mapping_to_json
+
+        The document is written incrementally; nested access lists are
+        streamed from the edge file (grouped by team, and by repository via
+        the on-disk repository index).
+        """
+        roles = self.meta['roles']
+        teams = list(self.iter_teams())
+        repo_names = self.repo_names
+        repo_full_names = self.repo_full_names
+
+        with open(filename, 'w') as f:
+            f.write('{\n')
+            f.write(f'  "organization": {json.dumps(self.meta["organization"])},\n')
+            f.write(f'  "generated_at": {json.dumps(self.meta["generated_at"])},\n')
+            f.write(f'  "scope": {json.dumps(self.meta["scope"])},\n')
+            f.write(f'  "summary": {json.dumps(self.summary())},\n')
+
+            # Repositories with their teams (repository-grouped edge order)
+            f.write('  "repositories": {')
+            edges = self.iter_edges(by_repo=True)
+            edge = next(edges, None)
+            for repo_index, repo_data in enumerate(self.iter_repositories()):
+                access = []
+                while edge is not None and edge[1] == repo_index:
+                    team = teams[edge[0]]
+                    role = roles[edge[2]]
+                    access.append({
+                        'team_slug': team['slug'],
+                        'team_name': team['name'],
+                        'role_name': role['role_name'],
+                        'permissions': role['permissions']
+                    })
+                    edge = next(edges, None)
+                entry = {k: repo_data[k] for k in ('id', 'full_name', 'private', 'description', 'default_branch')}
+                entry['teams_with_access'] = access
+                f.write(('\n    ' if repo_index == 0 else ',\n    ') +
+                        f'{json.dumps(repo_data["name"])}: {json.dumps(entry)}')
+            f.write('\n  },\n')
+
+            # Teams with their repositories (team-major edge order)
+            f.write('  "teams": {')
+            edges = self.iter_edges()
+            edge = next(edges, None)
+            for team_index, team_data in enumerate(teams):
+                access = []
+                while edge is not None and edge[0] == team_index:
+                    role = roles[edge[2]]
+                    access.append({
+                        'repo_name': repo_names[edge[1]],
+                        'repo_full_name': repo_full_names[edge[1]],
+                        'role_name': role['role_name'],
+                        'permissions': role['permissions']
+                    })
+                    edge = next(edges, None)
+                entry = dict(team_data)
+                entry['repositories_with_access'] = access
+                f.write(('\n    ' if team_index == 0 else ',\n    ') +
+                        f'{json.dumps(team_data["slug"])}: {json.dumps(entry)}')
+            f.write('\n  },\n')
+
+            # Flat permissions matrix
+            f.write('  "permissions_matrix": [')
+            first = True
+            for team_index, repo_index, code in self.iter_edges():
+                role = roles[code]
+                slug = teams[team_index]['slug']
+                f.write(('\n    ' if first else ',\n    ') + json.dumps({
+                    'team_slug': slug,
+                    'team_name': _approximate_team_name(slug),
+                    'repo_name': repo_names[repo_index],
+                    'repo_full_name': repo_full_names[repo_index],
+                    'permission_level': role['permission_level'],
+                    'role_name': role['role_name'],
+                    'permissions': role['permissions']
+                }))
+                first = False
+            f.write('\n  ]\n}\n')
+
+        print(f"📄 Mapping exported to {filename}")
+
+
+def _approximate_team_name(slug: str) -> str:
+    """Team name as reported by check_team_repository_permissions (derived from the slug)"""
+    return slug.replace('-', ' ').title()
@@ -17,13 +17,20 @@ Date: 2024
 """
 
 import requests
+import fnmatch
 import json
+import random
+import re
 import sys
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass
-from datetime import datetime
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
 import time
 
+from api_cache import API_CACHE, cached_api_call
+from profiling import NULL_TRACER
+
 
 @dataclass
 class Repository:
@@ -37,6 +44,9 @@ class Repository:
     created_at: str
     updated_at: str
     owner: str
+    archived: bool = False
+    visibility: str = ''
+    topics: List[str] = field(default_factory=list)
 
 
 @dataclass  
@@ -70,58 +80,368 @@ class TeamRepoPermission:
     has_pull: bool
 
 
+@dataclass
+class MappingScope:
+    """
+    Filters that narrow a mapping run to a slice of the organization
+
+    Every field is optional; an empty scope maps the whole organization.
+    Filters are applied as early as possible: visibility and updated_since
+    are pushed into the repository listing query, team_slugs replaces the
+    full team listing with one lookup per slug, and the remaining repository
+    filters run before any per-team or per-repository permission check.
+
+    Attributes:
+        team_slugs: Only map these teams
+        repo_pattern: Repository name glob (e.g. 'payments-*'), matched
+            against the whole name, or a regular expression when prefixed
+            with 're:', searched for anywhere in the name ('re:api' matches
+            'payments-api'; use 're:^api$' to anchor it)
+        topics: Only map repositories tagged with at least one of these topics
+        visibility: Only map 'public', 'private' or 'internal' repositories
+        archived: True for archived repositories only, False to exclude them,
+            None for both
+        updated_since: ISO 8601 date/time; only map repositories updated on
+            or after it
+    """
+    team_slugs: Optional[List[str]] = None
+    repo_pattern: Optional[str] = None
+    topics: Optional[List[str]] = None
+    visibility: Optional[str] = None
+    archived: Optional[bool] = None
+    updated_since: Optional[str] = None
+
+    def __post_init__(self):
+        # Empty lists and patterns filter nothing, so they count as unset
+        self.team_slugs = self.team_slugs or None
+        self.topics = self.topics or None
+        self.repo_pattern = self.repo_pattern or None
+        if self.visibility is not None and self.visibility not in ('public', 'private', 'internal'):
+            raise ValueError(f"Invalid visibility '{self.visibility}' (expected public, private or internal)")
+        if self.updated_since is not None:
+            # Validate early so a typo fails before any API call is made
+            datetime.fromisoformat(self.updated_since.replace('Z', '+00:00'))
+        self._repo_regex = compile_repo_pattern(self.repo_pattern) if self.repo_pattern else None
+
+    @property
+    def is_empty(self) -> bool:
+        """True when no filter is set"""
+        return not any(value is not None for value in self.to_dict().values())
+
+    def to_dict(self) -> Dict:
+        """Return the filters as a plain dictionary (for export)"""
+        return asdict(self)
+
+    def updated_since_timestamp(self) -> Optional[float]:
+        """Return updated_since as a POSIX timestamp, or None if unset"""
+        if self.updated_since is None:
+            return None
+        return _parse_github_timestamp(self.updated_since)
+
+    def matches_repository(self, repo: 'Repository') -> bool:
+        """Check whether a repository falls inside this scope"""
+        if self._repo_regex is not None and not self._repo_regex.search(repo.name):
+            return False
+        if self.topics and not set(self.topics).intersection(repo.topics):
+            return False
+        if self.visibility is not None:
+            visibility = repo.visibility or ('private' if repo.private else 'public')
+            if visibility != self.visibility:
+                return False
+        if self.archived is not None and repo.archived != self.archived:
+            return False
+        since = self.updated_since_timestamp()
+        if since is not None and _parse_github_timestamp(repo.updated_at) < since:
+            return False
+        return True
+
+    def matches_team(self, team: 'Team') -> bool:
+        """Check whether a team falls inside this scope"""
+        return not self.team_slugs or team.slug in self.team_slugs
+
+
+def compile_repo_pattern(pattern: str) -> 're.Pattern':
+    """
+    Compile a repository name glob, or a regular expression prefixed with 're:'
+
+    Use the result with search(): regular expressions match anywhere in the
+    name, like grep, while globs are anchored to match the whole name.
+    """
+    if pattern.startswith('re:'):
+        return re.compile(pattern[3:])
+    return re.compile(r'\A' + fnmatch.translate(pattern))
+
+
+def _parse_github_timestamp(value: str) -> float:
+    """Parse a GitHub ISO 8601 timestamp (or date) into a POSIX timestamp"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        # Dates without an offset are treated as UTC, like GitHub's own values
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class GitHubAPIError(Exception):
+    """
+    A GitHub API request failed
+
+    Attributes:
+        url: Request URL
+        method: HTTP method
+        status_code: HTTP status, or None when no response was received
+        response: The last response, if any
+        partial_result: Work completed before the failure, set by callers
+            such as generate_complete_team_repo_mapping
+    """
+
+    def __init__(self, message: str, url: str = '', method: str = 'GET',
+                 response: Optional[requests.Response] = None):
+        super().__init__(message)
+        self.url = url
+        self.method = method
+        self.response = response
+        self.status_code = response.status_code if response is not None else None
+        self.partial_result = None
+
+
+class TransientAPIError(GitHubAPIError):
+    """A retryable failure (5xx, timeout, connection error) persisted after all retries"""
+
+
+class RateLimitError(GitHubAPIError):
+    """The rate limit was still exceeded after the allowed number of waits"""
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry, timeout and circuit breaker settings for API requests
+
+    Attributes:
+        max_retries: Retries for transient failures (after the first attempt)
+        backoff_base: First backoff delay in seconds, doubled on each retry
+        backoff_max: Upper bound for a single backoff delay
+        timeout: (connect, read) timeout in seconds for every request
+        retry_statuses: HTTP statuses treated as transient
+        retry_methods: Idempotent methods that may be retried
+        max_rate_limit_waits: Rate-limit waits allowed per request
+        max_rate_limit_wait: Longest single rate-limit wait in seconds
+        breaker_window: Recent requests considered by the circuit breaker
+        breaker_threshold: Failure ratio in the window that opens the breaker
+        breaker_cooldown: Seconds to pause once the breaker opens
+    """
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    timeout: Tuple[float, float] = (10.0, 30.0)
+    retry_statuses: Tuple[int, ...] = (500, 502, 503, 504)
+    retry_methods: Tuple[str, ...] = ('GET', 'PUT', 'DELETE')
+    max_rate_limit_waits: int = 3
+    max_rate_limit_wait: float = 3600.0
+    breaker_window: int = 20
+    breaker_threshold: float = 0.5
+    breaker_cooldown: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Pause all requests when the recent failure rate spikes
+
+    Tracks the outcome of the last `window` requests. Once at least half the
+    window has been observed and the failure ratio reaches `threshold`, the
+    breaker opens: the next request waits for `cooldown` seconds and the
+    window starts over, so a struggling API gets room to recover instead of
+    being hammered by retries.
+    """
+
+    def __init__(self, window: int, threshold: float, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)
+        self.open_until = 0.0
+
+    def before_request(self):
+        """Wait out an open breaker"""
+        remaining = self.open_until - time.time()
+        if remaining > 0:
+            print(f"⏸️  High API error rate. Pausing {remaining:.0f} seconds...")
+            time.sleep(remaining)
+
+    def record(self, success: bool):
+        """Record a request outcome and open the breaker if needed"""
+        self.outcomes.append(success)
+        if len(self.outcomes) * 2 < self.outcomes.maxlen:
+            return
+        failures = self.outcomes.count(False)
+        if failures / len(self.outcomes) >= self.threshold:
+            self.open_until = time.time() + self.cooldown
+            self.outcomes.clear()
+
+
 class GitHubTeamRepoMapper:
     """GitHub Team-Repository Mapping Tool"""
     
-    def __init__(self, token: str, org: str):
+    def __init__(self, token: str, org: str, retry_policy: Optional[RetryPolicy] = None,
+                 use_cache: bool = True, progress: Optional[Callable[..., None]] = None,
+                 tracer=None):
         """
         Initialize the mapper with GitHub token and organization
         
         Args:
             token: GitHub personal access token with proper scopes
             org: Organization name
+            retry_policy: Retry/timeout settings (defaults to RetryPolicy())
+            use_cache: Share recent read results with other mappers in this
+                process (see api_cache.API_CACHE)
+            progress: Optional callback receiving structured progress events
+                as progress(event, **fields), e.g. for machine-readable output
+            tracer: Optional profiling.Tracer recording pipeline phases and
+                requests as timing spans (profiling is off by default)
         """
         self.token = token
         self.org = org
+        self.use_cache = use_cache
+        self.progress = progress
+        self.tracer = tracer if tracer is not None else NULL_TRACER
         self.headers = {
             'Authorization': f'Bearer {token}',
             'Accept': 'application/vnd.github+json',
             'X-GitHub-Api-Version': '2022-11-28'
         }
         self.base_url = 'https://api.github.com'
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = CircuitBreaker(
+            self.retry_policy.breaker_window,
+            self.retry_policy.breaker_threshold,
+            self.retry_policy.breaker_cooldown
+        )
+        self.session = requests.Session()
         
+    def _emit(self, event: str, **fields):
+        """Send a progress event to the progress callback, if any"""
+        if self.progress is not None:
+            self.progress(event, **fields)
+
+    def _sleep(self, seconds: float, reason: str):
+        """Sleep, recorded as a trace span so waits show up in profiles"""
+        with self.tracer.span(f'sleep_{reason}', 'wait'):
+            time.sleep(seconds)
+
+    def _traced_request(self, method: str, url: str, data: Optional[Dict],
+                        timeout: Tuple[float, float]) -> requests.Response:
+        """Send a request inside a trace span; decoding its JSON body is traced too"""
+        with self.tracer.span('http_request', 'http', method=method, url=url):
+            response = self.session.request(method, url, headers=self.headers, json=data, timeout=timeout)
+        response.json = self.tracer.wrap(response.json, 'decode_json', 'decode')
+        return response
+
+    @property
+    def cache_namespace(self) -> tuple:
+        """Cache key prefix; results are only shared for the same API, org and token"""
+        return (self.base_url, self.org, self.token)
+
     def _make_request(self, url: str, method: str = 'GET', data: Optional[Dict] = None) -> requests.Response:
-        """Make authenticated GitHub API request with error handling"""
-        try:
-            if method == 'GET':
-                response = requests.get(url, headers=self.headers)
-            elif method == 'PUT':
-                response = requests.put(url, headers=self.headers, json=data)
-            elif method == 'POST':
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=self.headers)
+        """
+        Make authenticated GitHub API request with retries
+
+        Transient failures (5xx, timeouts, connection errors) of idempotent
+        methods are retried with exponential backoff and jitter; rate limits
+        wait for the reset time a bounded number of times.
+
+        Raises:
+            RateLimitError: Rate limit still exceeded after the allowed waits
+            TransientAPIError: Transient failure persisted after all retries
+            GitHubAPIError: Any other failed request (e.g. 4xx responses)
+        """
+        policy = self.retry_policy
+        retryable = method in policy.retry_methods
+        attempt = 0
+        rate_limit_waits = 0
+        
+        while True:
+            self.circuit_breaker.before_request()
+            try:
+                if self.tracer.enabled:
+                    response = self._traced_request(method, url, data, policy.timeout)
+                else:
+                    response = self.session.request(
+                        method, url, headers=self.headers, json=data, timeout=policy.timeout
+                    )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                self.circuit_breaker.record(False)
+                if not retryable or attempt >= policy.max_retries:
+                    raise TransientAPIError(f"{method} {url} failed: {e}", url, method) from e
+                delay = policy.backoff(attempt)
+                attempt += 1
+                print(f"⚠️  {type(e).__name__} on {method} {url}. Retry {attempt}/{policy.max_retries} in {delay:.1f}s...")
+                self._sleep(delay, 'retry')
+                continue
+            except requests.exceptions.RequestException as e:
+                raise GitHubAPIError(f"{method} {url} failed: {e}", url, method) from e
+                
+            # Handle rate limiting (primary and secondary limits)
+            if self._is_rate_limited(response):
+                if rate_limit_waits >= policy.max_rate_limit_waits:
+                    raise RateLimitError(f"Rate limit still exceeded for {method} {url}", url, method, response)
+                wait_time = min(self._rate_limit_wait(response), policy.max_rate_limit_wait)
+                rate_limit_waits += 1
+                print(f"Rate limit exceeded. Waiting {wait_time:.0f} seconds...")
+                self._sleep(wait_time, 'rate_limit')
+                continue
                 
-            # Handle rate limiting
-            if response.status_code == 403 and 'rate limit' in response.text.lower():
-                reset_time = int(response.headers.get('X-RateLimit-Reset', time.time() + 3600))
-                wait_time = reset_time - int(time.time()) + 1
-                print(f"Rate limit exceeded. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-                return self._make_request(url, method, data)
+            if response.status_code in policy.retry_statuses:
+                self.circuit_breaker.record(False)
+                if not retryable or attempt >= policy.max_retries:
+                    raise TransientAPIError(
+                        f"{method} {url} failed with status {response.status_code}", url, method, response
+                    )
+                delay = policy.backoff(attempt)
+                attempt += 1
+                print(f"⚠️  Status {response.status_code} on {method} {url}. Retry {attempt}/{policy.max_retries} in {delay:.1f}s...")
+                self._sleep(delay, 'retry')
+                continue
                 
-            response.raise_for_status()
+            self.circuit_breaker.record(True)
+            if response.status_code >= 400:
+                raise GitHubAPIError(
+                    f"{method} {url} failed with status {response.status_code}: {response.text[:200]}",
+                    url, method, response
+                )
             return response
-            
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response body: {e.response.text}")
-            sys.exit(1)
-
-    def _paginate_results(self, url: str) -> List[Dict]:
-        """Handle paginated API responses"""
+
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        """Check whether a response was rejected by a (primary or secondary) rate limit"""
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            response.headers.get('X-RateLimit-Remaining') == '0'
+            or 'rate limit' in response.text.lower()
+        )
+
+    @staticmethod
+    def _rate_limit_wait(response: requests.Response) -> float:
+        """Seconds to wait before retrying a rate-limited request"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None and retry_after.isdigit():
+            return int(retry_after)
+        reset_time = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
+        return max(reset_time - int(time.time()) + 1, 1)
+
+    def _paginate_results(self, url: str, stop_when: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+        """
+        Handle paginated API responses
+
+        Args:
+            url: Endpoint URL, optionally with query parameters
+            stop_when: Optional predicate; pagination stops at the first item
+                for which it returns True (that item is not included). Used
+                with sorted listings so no further pages are requested.
+        """
         all_results = []
         page = 1
         
@@ -133,6 +453,12 @@ class GitHubTeamRepoMapper:
             if not results:  # Empty response means no more pages
                 break
                 
+            if stop_when is not None:
+                for index, item in enumerate(results):
+                    if stop_when(item):
+                        all_results.extend(results[:index])
+                        return all_results
+                    
             all_results.extend(results)
             page += 1
             
@@ -142,65 +468,111 @@ class GitHubTeamRepoMapper:
                 
         return all_results
 
-    def list_organization_repositories(self) -> List[Repository]:
+    @cached_api_call()
+    def list_organization_repositories(self, scope: Optional[MappingScope] = None) -> List[Repository]:
         """
         List all repositories in the organization
         
         Uses: GET /orgs/{org}/repos
         Required permissions: read:org scope for OAuth tokens
+
+        Args:
+            scope: Optional filters. Public/private visibility is sent as the
+                'type' query parameter and updated_since sorts the listing by
+                update time so pagination stops at the first older repository.
         """
         print(f"📚 Fetching repositories for organization: {self.org}")
         
         url = f"{self.base_url}/orgs/{self.org}/repos"
-        repo_data = self._paginate_results(url)
-        
-        repositories = []
-        for repo in repo_data:
-            repositories.append(Repository(
-                id=repo['id'],
-                name=repo['name'],
-                full_name=repo['full_name'],
-                private=repo['private'],
-                description=repo.get('description'),
-                default_branch=repo['default_branch'],
-                created_at=repo['created_at'],
-                updated_at=repo['updated_at'],
-                owner=repo['owner']['login']
-            ))
+        stop_when = None
+        if scope is not None:
+            params = []
+            if scope.visibility in ('public', 'private'):
+                params.append(f"type={scope.visibility}")
+            since = scope.updated_since_timestamp()
+            if since is not None:
+                params.append("sort=updated&direction=desc")
+                stop_when = lambda repo: _parse_github_timestamp(repo['updated_at']) < since
+            if params:
+                url = f"{url}?{'&'.join(params)}"
+        repo_data = self._paginate_results(url, stop_when=stop_when)
+        
+        with self.tracer.span('build_repositories', 'build'):
+            repositories = []
+            for repo in repo_data:
+                repository = Repository(
+                    id=repo['id'],
+                    name=repo['name'],
+                    full_name=repo['full_name'],
+                    private=repo['private'],
+                    description=repo.get('description'),
+                    default_branch=repo['default_branch'],
+                    created_at=repo['created_at'],
+                    updated_at=repo['updated_at'],
+                    owner=repo['owner']['login'],
+                    archived=repo.get('archived', False),
+                    visibility=repo.get('visibility', ''),
+                    topics=repo.get('topics') or []
+                )
+                if scope is None or scope.matches_repository(repository):
+                    repositories.append(repository)
             
         print(f"✅ Found {len(repositories)} repositories")
         return repositories
 
-    def list_organization_teams(self) -> List[Team]:
+    def _build_team(self, team: Dict) -> Team:
+        """Build a Team from an API team object"""
+        return Team(
+            id=team['id'],
+            name=team['name'],
+            slug=team['slug'],
+            description=team.get('description'),
+            privacy=team['privacy'],
+            permission=team.get('permission', 'pull'),
+            members_count=team.get('members_count', 0),
+            repos_count=team.get('repos_count', 0),
+            created_at=team.get('created_at', ''),
+            updated_at=team.get('updated_at', '')
+        )
+
+    @cached_api_call()
+    def list_organization_teams(self, scope: Optional[MappingScope] = None) -> List[Team]:
         """
         List all teams in the organization
         
         Uses: GET /orgs/{org}/teams
         Required permissions: Members organization permissions (read)
+
+        Args:
+            scope: Optional filters. When team_slugs is set, each team is
+                fetched directly (GET /orgs/{org}/teams/{team_slug}) instead
+                of listing every team in the organization.
         """
         print(f"👥 Fetching teams for organization: {self.org}")
         
-        url = f"{self.base_url}/orgs/{self.org}/teams"
-        team_data = self._paginate_results(url)
-        
-        teams = []
-        for team in team_data:
-            teams.append(Team(
-                id=team['id'],
-                name=team['name'],
-                slug=team['slug'],
-                description=team.get('description'),
-                privacy=team['privacy'],
-                permission=team.get('permission', 'pull'),
-                members_count=team['members_count'],
-                repos_count=team['repos_count'],
-                created_at=team['created_at'],
-                updated_at=team['updated_at']
-            ))
+        if scope is not None and scope.team_slugs:
+            teams = [self.get_team(slug) for slug in dict.fromkeys(scope.team_slugs)]
+        else:
+            url = f"{self.base_url}/orgs/{self.org}/teams"
+            team_data = self._paginate_results(url)
+            with self.tracer.span('build_teams', 'build'):
+                teams = [self._build_team(team) for team in team_data]
             
         print(f"✅ Found {len(teams)} teams")
         return teams
 
+    @cached_api_call()
+    def get_team(self, team_slug: str) -> Team:
+        """
+        Get a single team by slug
+
+        Uses: GET /orgs/{org}/teams/{team_slug}
+        Required permissions: Members organization permissions (read)
+        """
+        url = f"{self.base_url}/orgs/{self.org}/teams/{team_slug}"
+        return self._build_team(self._make_request(url).json())
+
+    @cached_api_call()
     def check_team_repository_permissions(self, team_slug: str, owner: str, repo: str) -> Optional[TeamRepoPermission]:
         """
         Check team permissions for a specific repository
@@ -211,6 +583,16 @@ class GitHubTeamRepoMapper:
         Returns:
             TeamRepoPermission object if team has access, None if no access
         """
+        return self._check_team_repository_permissions(team_slug, owner, repo)
+
+    def _check_team_repository_permissions(self, team_slug: str, owner: str, repo: str) -> Optional[TeamRepoPermission]:
+        """
+        Uncached check_team_repository_permissions
+
+        Used by the mapping loops, which check each team/repository pair once:
+        a run over more pairs than the cache holds would only churn its LRU
+        order and evict every other entry without ever getting a hit.
+        """
         url = f"{self.base_url}/orgs/{self.org}/teams/{team_slug}/repos/{owner}/{repo}"
         
         try:
@@ -250,8 +632,8 @@ class GitHubTeamRepoMapper:
                     has_pull=True  # Assume at least pull access
                 )
                 
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
+        except GitHubAPIError as e:
+            if e.status_code == 404:
                 # Team does not have access to repository
                 return None
             raise
@@ -283,33 +665,22 @@ class GitHubTeamRepoMapper:
             if response.status_code == 204:
                 print(f"✅ Updated {team_slug} permissions for {owner}/{repo} to {permission}")
                 return True
-        except requests.exceptions.HTTPError as e:
+        except GitHubAPIError as e:
             print(f"❌ Failed to update {team_slug} permissions for {owner}/{repo}: {e}")
             return False
+        finally:
+            # Even a failed PUT may have been applied server-side
+            self.invalidate_cached_permissions(team_slug, owner, repo)
             
         return False
 
-    def generate_complete_team_repo_mapping(self) -> Dict:
-        """
-        Generate complete mapping of teams to repositories with permissions
-        
-        This is the main function that combines all API endpoints to create
-        a comprehensive view of team-repository relationships
-        """
-        print("🔍 Starting comprehensive team-repository mapping...")
-        
-        # Step 1: Get all repositories
-        repositories = self.list_organization_repositories()
-        
-        # Step 2: Get all teams
-        teams = self.list_organization_teams()
-        
-        # Step 3: Check each team's permissions for each repository
-        print(f"🔄 Checking permissions for {len(teams)} teams across {len(repositories)} repositories...")
-        
+    def _new_mapping(self, repositories: List[Repository], teams: List[Team],
+                     scope: Optional[MappingScope] = None) -> Dict:
+        """Create an empty mapping structure for the given repositories and teams"""
         mapping = {
             'organization': self.org,
             'generated_at': datetime.now().isoformat(),
+            'scope': scope.to_dict() if scope is not None else None,
             'summary': {
                 'total_repositories': len(repositories),
                 'total_teams': len(teams),
@@ -320,7 +691,7 @@ class GitHubTeamRepoMapper:
             'teams': {},
             'permissions_matrix': []
         }
-        
+
         # Initialize repository data
         for repo in repositories:
             mapping['repositories'][repo.name] = {
@@ -331,7 +702,7 @@ class GitHubTeamRepoMapper:
                 'default_branch': repo.default_branch,
                 'teams_with_access': []
             }
-            
+
         # Initialize team data  
         for team in teams:
             mapping['teams'][team.slug] = {
@@ -346,74 +717,240 @@ class GitHubTeamRepoMapper:
                 'repositories_with_access': []
             }
         
-        # Check permissions matrix
-        for team in teams:
-            for repo in repositories:
-                print(f"  🔍 Checking {team.slug} access to {repo.name}...")
-                
-                permission = self.check_team_repository_permissions(
-                    team.slug, repo.owner, repo.name
-                )
-                
-                mapping['summary']['total_permissions_checked'] += 1
-                
-                if permission:
-                    mapping['summary']['total_access_granted'] += 1
-                    
-                    # Add to permissions matrix
-                    mapping['permissions_matrix'].append({
-                        'team_slug': permission.team_slug,
-                        'team_name': permission.team_name,
-                        'repo_name': permission.repo_name,
-                        'repo_full_name': permission.repo_full_name,
-                        'permission_level': permission.permission_level,
-                        'role_name': permission.role_name,
-                        'permissions': {
-                            'admin': permission.has_admin,
-                            'maintain': permission.has_maintain,
-                            'push': permission.has_push,
-                            'triage': permission.has_triage,
-                            'pull': permission.has_pull
-                        }
-                    })
-                    
-                    # Update repository teams list
-                    mapping['repositories'][repo.name]['teams_with_access'].append({
-                        'team_slug': team.slug,
-                        'team_name': team.name,
-                        'role_name': permission.role_name,
-                        'permissions': {
-                            'admin': permission.has_admin,
-                            'maintain': permission.has_maintain,
-                            'push': permission.has_push,
-                            'triage': permission.has_triage,
-                            'pull': permission.has_pull
-                        }
-                    })
+        return mapping
+
+    def _record_permission(self, mapping: Dict, team: Team, repo: Repository,
+                           permission: Optional[TeamRepoPermission]):
+        """Record the result of one team/repository permission check in a mapping"""
+        mapping['summary']['total_permissions_checked'] += 1
+
+        if permission:
+            mapping['summary']['total_access_granted'] += 1
+
+            # Add to permissions matrix
+            mapping['permissions_matrix'].append({
+                'team_slug': permission.team_slug,
+                'team_name': permission.team_name,
+                'repo_name': permission.repo_name,
+                'repo_full_name': permission.repo_full_name,
+                'permission_level': permission.permission_level,
+                'role_name': permission.role_name,
+                'permissions': {
+                    'admin': permission.has_admin,
+                    'maintain': permission.has_maintain,
+                    'push': permission.has_push,
+                    'triage': permission.has_triage,
+                    'pull': permission.has_pull
+                }
+            })
+
+            # Update repository teams list
+            mapping['repositories'][repo.name]['teams_with_access'].append({
+                'team_slug': team.slug,
+                'team_name': team.name,
+                'role_name': permission.role_name,
+                'permissions': {
+                    'admin': permission.has_admin,
+                    'maintain': permission.has_maintain,
+                    'push': permission.has_push,
+                    'triage': permission.has_triage,
+                    'pull': permission.has_pull
+                }
+            })
+
+            # Update team repositories list
+            mapping['teams'][team.slug]['repositories_with_access'].append({
+                'repo_name': repo.name,
+                'repo_full_name': repo.full_name,
+                'role_name': permission.role_name,
+                'permissions': {
+                    'admin': permission.has_admin,
+                    'maintain': permission.has_maintain,
+                    'push': permission.has_push,
+                    'triage': permission.has_triage,
+                    'pull': permission.has_pull
+                }
+            })
+
+    def invalidate_cached_permissions(self, team_slug: str, owner: str, repo: str):
+        """
+        Drop cached reads made stale by a permission change for this team and repository
+
+        Entries are dropped for every token used with this organization, not
+        just this mapper's: other mappers would otherwise keep serving the old
+        permission until their entries expire.
+        """
+        api, org = self.base_url, self.org
+        checked = (team_slug, owner, repo)
+
+        def is_stale(key) -> bool:
+            (key_api, key_org, _token), name, args, kwargs = key
+            if key_api != api or key_org != org:
+                return False
+            if name == 'check_team_repository_permissions':
+                return args == checked or tuple(dict(kwargs).get(k) for k in ('team_slug', 'owner', 'repo')) == checked
+            # Team listings include each team's repos_count
+            return name in ('list_organization_teams', 'get_team')
+
+        API_CACHE.invalidate(is_stale)
+
+    def _list_mapping_inputs(self, scope: Optional[MappingScope]) -> Tuple[List[Repository], List[Team]]:
+        """List the repositories and teams a mapping run checks against each other"""
+        # Step 1: Get all repositories
+        with self.tracer.span('list_repositories'):
+            repositories = self.list_organization_repositories(scope)
+        
+        # Step 2: Get all teams
+        with self.tracer.span('list_teams'):
+            teams = self.list_organization_teams(scope)
+        
+        print(f"🔄 Checking permissions for {len(teams)} teams across {len(repositories)} repositories...")
+        return repositories, teams
+
+    def _check_permission_matrix(self, teams: List[Team], repositories: List[Repository],
+                                 record: Callable[[int, int, Optional[TeamRepoPermission]], None]):
+        """
+        Check every team's permissions on every repository
+
+        Shared by the in-memory and out-of-core mapping runs, which differ
+        only in where results go.
+
+        Args:
+            teams: Teams to check
+            repositories: Repositories to check each team against
+            record: Sink called as record(team_index, repo_index, permission)
+                for every check; permission is None when the team has no access
+        """
+        total_checks = len(teams) * len(repositories)
+        self._emit('mapping_started', teams=len(teams), repositories=len(repositories), checks=total_checks)
+        
+        # Bound once so the loop carries no tracing code when profiling is off
+        check = self._check_team_repository_permissions
+        record = self.tracer.wrap(record, 'aggregate', 'aggregate')
+        throttle = self.tracer.wrap(time.sleep, 'sleep_throttle', 'wait')
+        done = 0
+        
+        with self.tracer.span('check_permissions'):
+            for team_index, team in enumerate(teams):
+                for repo_index, repo in enumerate(repositories):
+                    print(f"  🔍 Checking {team.slug} access to {repo.name}...")
                     
-                    # Update team repositories list
-                    mapping['teams'][team.slug]['repositories_with_access'].append({
-                        'repo_name': repo.name,
-                        'repo_full_name': repo.full_name,
-                        'role_name': permission.role_name,
-                        'permissions': {
-                            'admin': permission.has_admin,
-                            'maintain': permission.has_maintain,
-                            'push': permission.has_push,
-                            'triage': permission.has_triage,
-                            'pull': permission.has_pull
-                        }
-                    })
+                    permission = check(team.slug, repo.owner, repo.name)
+                    record(team_index, repo_index, permission)
+                    done += 1
+                    self._emit('permission_checked', team=team.slug, repo=repo.name,
+                               role=permission.role_name if permission else None,
+                               done=done, total=total_checks)
                     
-                # Small delay to be respectful of rate limits
-                time.sleep(0.1)
-                
+                    # Small delay to be respectful of rate limits
+                    throttle(0.1)
+
+    def _report_mapping_completed(self, grants: int, checks: int):
+        """Print and emit the end-of-run totals"""
         print(f"✅ Mapping completed!")
-        print(f"   📊 {mapping['summary']['total_access_granted']} access grants found")
-        print(f"   📊 {mapping['summary']['total_permissions_checked']} permissions checked")
+        print(f"   📊 {grants} access grants found")
+        print(f"   📊 {checks} permissions checked")
+        self._emit('mapping_completed', grants=grants, checks=checks)
+
+    def generate_complete_team_repo_mapping(self, scope: Optional[MappingScope] = None) -> Dict:
+        """
+        Generate complete mapping of teams to repositories with permissions
+        
+        This is the main function that combines all API endpoints to create
+        a comprehensive view of team-repository relationships
+
+        Args:
+            scope: Optional filters restricting the run to a slice of the
+                organization; permission checks are only made inside the slice
+
+        Raises:
+            GitHubAPIError: If a permission check fails for good; the mapping
+                built so far is available as the exception's partial_result
+        """
+        if scope is not None and scope.is_empty:
+            scope = None
+        print("🔍 Starting comprehensive team-repository mapping...")
+        
+        repositories, teams = self._list_mapping_inputs(scope)
+        mapping = self._new_mapping(repositories, teams, scope)
         
+        def record(team_index: int, repo_index: int, permission: Optional[TeamRepoPermission]):
+            self._record_permission(mapping, teams[team_index], repositories[repo_index], permission)
+        
+        # Step 3: Check each team's permissions for each repository
+        try:
+            self._check_permission_matrix(teams, repositories, record)
+        except GitHubAPIError as e:
+            # Hand the checks completed so far back to the caller
+            mapping['summary']['incomplete'] = True
+            e.partial_result = mapping
+            raise
+        
+        self._report_mapping_completed(mapping['summary']['total_access_granted'],
+                                       mapping['summary']['total_permissions_checked'])
         return mapping
 
+    def generate_team_repo_mapping_to_disk(self, path: str, scope: Optional[MappingScope] = None):
+        """
+        Generate the team-repository mapping into an on-disk EdgeStore
+
+        Out-of-core variant of generate_complete_team_repo_mapping for very
+        large organizations: access grants are appended to a fixed-width edge
+        file instead of being kept in memory. Use the returned store's
+        print_summary_report() and export_json() for reports and exports.
+
+        Args:
+            path: Directory for the store files
+            scope: Optional filters restricting the run to a slice of the organization
+
+        Returns:
+            The completed EdgeStore, opened for reading
+        """
+        from edge_store import EdgeStore
+
+        if scope is not None and scope.is_empty:
+            scope = None
+        print("🔍 Starting out-of-core team-repository mapping...")
+        
+        repositories, teams = self._list_mapping_inputs(scope)
+        print(f"💾 Writing access grants to {path}")
+        
+        store = EdgeStore.create(path, self.org, scope.to_dict() if scope is not None else None)
+        try:
+            for repo in repositories:
+                store.add_repository({
+                    'name': repo.name,
+                    'id': repo.id,
+                    'full_name': repo.full_name,
+                    'private': repo.private,
+                    'description': repo.description,
+                    'default_branch': repo.default_branch
+                })
+            for team in teams:
+                store.add_team({
+                    'id': team.id,
+                    'name': team.name,
+                    'slug': team.slug,
+                    'description': team.description,
+                    'privacy': team.privacy,
+                    'default_permission': team.permission,
+                    'members_count': team.members_count,
+                    'repos_count': team.repos_count
+                })
+            
+            self._check_permission_matrix(teams, repositories, store.record_check)
+        except GitHubAPIError as e:
+            # The grants written so far stay readable on disk
+            store.meta['incomplete'] = True
+            store.close()
+            e.partial_result = EdgeStore.open(path)
+            raise
+        store.close()
+        
+        self._report_mapping_completed(store.meta['total_access_granted'],
+                                       store.meta['total_permissions_checked'])
+        return EdgeStore.open(path)
+
     def export_mapping_to_json(self, mapping: Dict, filename: str = None):
         """Export mapping to JSON file"""
         if filename is None:
@@ -424,51 +961,29 @@ class GitHubTeamRepoMapper:
             
         print(f"📄 Mapping exported to {filename}")
 
-    def print_summary_report(self, mapping: Dict):
-        """Print a human-readable summary report"""
-        print("\n" + "="*80)
-        print(f"TEAM-REPOSITORY MAPPING REPORT")
-        print(f"Organization: {mapping['organization']}")
-        print(f"Generated: {mapping['generated_at']}")
-        print("="*80)
-        
-        summary = mapping['summary']
-        print(f"\n📊 SUMMARY:")
-        print(f"   Total Repositories: {summary['total_repositories']}")
-        print(f"   Total Teams: {summary['total_teams']}")
-        print(f"   Total Permissions Checked: {summary['total_permissions_checked']}")
-        print(f"   Total Access Grants: {summary['total_access_granted']}")
-        
-        print(f"\n👥 TEAMS:")
-        for team_slug, team_data in mapping['teams'].items():
-            repos_count = len(team_data['repositories_with_access'])
-            print(f"   {team_data['name']} ({team_slug})")
-            print(f"      Members: {team_data['members_count']}")
-            print(f"      Repositories with access: {repos_count}")
-            print(f"      Privacy: {team_data['privacy']}")
-            print(f"      Default permission: {team_data['default_permission']}")
-        
-        print(f"\n📚 REPOSITORIES:")
-        for repo_name, repo_data in mapping['repositories'].items():
-            teams_count = len(repo_data['teams_with_access'])
-            privacy = "🔒 Private" if repo_data['private'] else "🔓 Public"
-            print(f"   {repo_data['full_name']} {privacy}")
-            print(f"      Teams with access: {teams_count}")
-            print(f"      Default branch: {repo_data['default_branch']}")
-            
-        print(f"\n🔐 PERMISSION DETAILS:")
-        for perm in mapping['permissions_matrix']:
-            permissions_list = [k for k, v in perm['permissions'].items() if v]
-            print(f"   {perm['team_name']} → {perm['repo_name']}")
-            print(f"      Role: {perm['role_name']}")
-            print(f"      Permissions: {', '.join(permissions_list)}")
+    def print_summary_report(self, mapping: Dict, fmt: str = 'text', options=None):
+        """
+        Print an aggregated summary report
+
+        Shows the role histogram, top teams and repositories by grant count,
+        teams with admin sprawl and repositories without team access (see
+        reporting.build_report), written in one buffered write.
+
+        Args:
+            mapping: Mapping from generate_complete_team_repo_mapping
+            fmt: 'text', 'markdown' or 'json'
+            options: Optional reporting.ReportOptions (filters, top-N, pagination)
+        """
+        from reporting import write_report
+        write_report(mapping, fmt, options=options)
 
     def bulk_assign_permissions(self, assignments: List[Dict]) -> Dict:
         """
         Bulk assign repository permissions to teams
         
         Args:
-            assignments: List of dictionaries with keys:
+            assignments: List (or other sized iterable, such as an
+                assignment_csv.IngestResult) of dictionaries with keys:
                 - team_slug: Team slug
                 - repo_owner: Repository owner  
                 - repo_name: Repository name
@@ -486,35 +1001,38 @@ class GitHubTeamRepoMapper:
             'details': []
         }
         
-        for assignment in assignments:
-            team_slug = assignment['team_slug']
-            repo_owner = assignment['repo_owner']
-            repo_name = assignment['repo_name']
-            permission = assignment['permission']
+        with self.tracer.span('apply_assignments'):
+            for assignment in assignments:
+                team_slug = assignment['team_slug']
+                repo_owner = assignment['repo_owner']
+                repo_name = assignment['repo_name']
+                permission = assignment['permission']
             
-            print(f"  🔄 Assigning {permission} permission to {team_slug} for {repo_owner}/{repo_name}...")
+                print(f"  🔄 Assigning {permission} permission to {team_slug} for {repo_owner}/{repo_name}...")
             
-            success = self.add_or_update_team_repository_permissions(
-                team_slug, repo_owner, repo_name, permission
-            )
+                success = self.add_or_update_team_repository_permissions(
+                    team_slug, repo_owner, repo_name, permission
+                )
             
-            result_detail = {
-                'team_slug': team_slug,
-                'repo_owner': repo_owner,
-                'repo_name': repo_name,
-                'permission': permission,
-                'success': success
-            }
+                result_detail = {
+                    'team_slug': team_slug,
+                    'repo_owner': repo_owner,
+                    'repo_name': repo_name,
+                    'permission': permission,
+                    'success': success
+                }
             
-            results['details'].append(result_detail)
+                results['details'].append(result_detail)
             
-            if success:
-                results['successful'] += 1
-            else:
-                results['failed'] += 1
+                if success:
+                    results['successful'] += 1
+                else:
+                    results['failed'] += 1
+                self._emit('assignment', done=results['successful'] + results['failed'],
+                           total=results['total'], **result_detail)
                 
-            # Small delay to be respectful of rate limits
-            time.sleep(0.2)
+                # Small delay to be respectful of rate limits
+                self._sleep(0.2, 'throttle')
             
         print(f"✅ Bulk assignment completed!")
         print(f"   📊 {results['successful']} successful")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Opt-in Profiling for Mapping and Bulk Runs
+
+GitHubTeamRepoMapper wraps its pipeline phases (listing, permission
+checks, aggregation) and every API request, JSON decode and sleep in
+tracer spans. By default the mapper uses NULL_TRACER: per-phase spans are
+no-ops and per-request hooks are not installed at all, so the hot loops
+run unchanged. Pass a Tracer to record them:
+
+- a Chrome trace file (chrome://tracing, Perfetto, speedscope) with one
+  event per span, capped at max_events
+- a per-span breakdown of call count, wall time, self time (wall time not
+  spent in nested spans) and CPU time; wall minus CPU is time spent waiting
+  on the network or sleeping
+
+profile_run() additionally runs a sampling profiler (folded stacks for
+flamegraph.pl / speedscope) or cProfile (pstats file) around the run.
+"""
+
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional
+
+DEFAULT_MAX_EVENTS = 1000000
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+PROFILERS = ('sample', 'cprofile')
+
+
+class NullTracer:
+    """Tracer that records nothing (the default)"""
+    enabled = False
+
+    _span = contextlib.nullcontext()
+
+    def span(self, name: str, cat: str = 'phase', **args):
+        return self._span
+
+    def wrap(self, func: Callable, name: str, cat: str = 'phase') -> Callable:
+        return func
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer:
+    """Records nested timing spans for a Chrome trace and a per-span breakdown"""
+    enabled = True
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        self.max_events = max_events
+        self.events: List[Dict] = []
+        self.dropped = 0
+        self.files: List[str] = []
+        # name -> [category, count, wall, self wall, cpu]
+        self._stats: Dict[str, list] = {}
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._threads: Dict[int, str] = {}
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = 'phase', **args) -> Iterator[None]:
+        """Time the enclosed block as a span called name"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            thread = threading.current_thread()
+            self._threads[thread.ident] = thread.name
+        stack.append(0.0)  # wall time of nested spans
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += wall
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [cat, 0, 0.0, 0.0, 0.0]
+            stats[1] += 1
+            stats[2] += wall
+            stats[3] += wall - nested
+            stats[4] += cpu
+            if len(self.events) < self.max_events:
+                event = {
+                    'name': name, 'cat': cat, 'ph': 'X',
+                    'ts': round((start - self._origin) * 1e6, 1), 'dur': round(wall * 1e6, 1),
+                    'pid': self._pid, 'tid': threading.get_ident()
+                }
+                if args:
+                    event['args'] = args
+                self.events.append(event)
+            else:
+                self.dropped += 1
+
+    def wrap(self, func: Callable, name: str, cat: str = 'phase') -> Callable:
+        """Return func made to run inside a span on every call"""
+        span = self.span
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            with span(name, cat):
+                return func(*args, **kwargs)
+        return traced
+
+    def breakdown(self) -> List[Dict]:
+        """Per-span totals, slowest first"""
+        rows = [{
+            'name': name, 'category': cat, 'count': count,
+            'wall_s': round(wall, 6), 'self_s': round(self_wall, 6), 'cpu_s': round(cpu, 6)
+        } for name, (cat, count, wall, self_wall, cpu) in self._stats.items()]
+        rows.sort(key=lambda row: row['wall_s'], reverse=True)
+        return rows
+
+    def render_breakdown(self) -> str:
+        """Format breakdown() as a text table"""
+        rows = self.breakdown()
+        total = max((row['wall_s'] for row in rows), default=0.0) or 1.0
+        lines = [
+            f"{'span':<24} {'count':>9} {'wall (s)':>10} {'self (s)':>10} {'cpu (s)':>10} {'wait (s)':>10} {'%':>6}",
+            "-" * 85
+        ]
+        for row in rows:
+            wait = max(row['wall_s'] - row['cpu_s'], 0.0)
+            lines.append(
+                f"{row['name']:<24} {row['count']:>9} {row['wall_s']:>10.3f} {row['self_s']:>10.3f} "
+                f"{row['cpu_s']:>10.3f} {wait:>10.3f} {row['wall_s'] / total * 100:>5.1f}%"
+            )
+        if self.dropped:
+            lines.append(f"({self.dropped} spans not written to the trace file, limit {self.max_events})")
+        return '\n'.join(lines)
+
+    def write_chrome_trace(self, filename: str):
+        """Write recorded spans in Chrome trace event format"""
+        import json
+
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in self._threads.items()]
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, f)
+        self.files.append(filename)
+
+
+class SamplingProfiler:
+    """
+    Samples the call stack of one thread at a fixed interval
+
+    Samples are aggregated as folded stacks ("outer;inner;leaf count"), the
+    input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, filename: str):
+        """Write the samples as folded stacks"""
+        with open(filename, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextlib.contextmanager
+def profile_run(trace_file: str, profiler: Optional[str] = None,
+                interval: float = DEFAULT_SAMPLE_INTERVAL) -> Iterator[Tracer]:
+    """
+    Trace (and optionally profile) the enclosed run
+
+    Yields a Tracer to pass to GitHubTeamRepoMapper. On exit the Chrome
+    trace is written to trace_file, and the profiler output next to it:
+    <trace>.folded for 'sample', <trace>.prof for 'cprofile'. The paths
+    are listed in the tracer's files attribute.
+    """
+    if profiler is not None and profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}' (expected {' or '.join(PROFILERS)})")
+    base = trace_file[:-5] if trace_file.endswith('.json') else trace_file
+    tracer = Tracer()
+    sampler = None
+    cprofiler = None
+    if profiler == 'sample':
+        sampler = SamplingProfiler(interval)
+        sampler.start()
+    elif profiler == 'cprofile':
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+    try:
+        with tracer.span('run', 'run'):
+            yield tracer
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            sampler.write_folded(base + '.folded')
+            tracer.files.append(base + '.folded')
+        if cprofiler is not None:
+            cprofiler.disable()
+            cprofiler.dump_stats(base + '.prof')
+            tracer.files.append(base + '.prof')
+        tracer.write_chrome_trace(trace_file)
@@ -4,16 +4,20 @@
 
 This is the main entry point for the GitHub Team-Repository Mapping tool.
 Choose from simple menu options to get started quickly!
+
+Run with arguments (e.g. `python3 quick_start.py map --help`) to use the
+non-interactive command line interface in cli.py instead.
 """
 
 import os
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from github_team_repo_mapper import GitHubTeamRepoMapper
+if TYPE_CHECKING:
+    from github_team_repo_mapper import GitHubAPIError, GitHubTeamRepoMapper, MappingScope
 
 
 def print_banner():
@@ -53,6 +57,8 @@ def check_prerequisites() -> tuple[Optional[str], Optional[str]]:
 
 def quick_overview():
     """Show a quick overview of current team-repo mappings"""
+    from github_team_repo_mapper import GitHubTeamRepoMapper
+    
     print("🔍 Quick Overview - Current Team & Repository Mappings")
     print("-" * 70)
     
@@ -94,8 +100,39 @@ def quick_overview():
         print("Please check your GitHub token and organization name.")
 
 
+def _split_list(value: str) -> Optional[List[str]]:
+    """Split a comma-separated answer into a list (None when blank)"""
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    return items or None
+
+
+def prompt_mapping_scope() -> Optional['MappingScope']:
+    """Ask for optional scope filters (press Enter to skip each one)"""
+    from github_team_repo_mapper import MappingScope
+    
+    print("🎯 Optional filters - press Enter to skip and map everything")
+    teams = input("   Team slugs (comma-separated): ").strip()
+    pattern = input("   Repository name pattern (e.g. payments-*, or re:<regex>): ").strip()
+    topics = input("   Repository topics (comma-separated): ").strip()
+    visibility = input("   Visibility (public/private/internal): ").strip().lower()
+    archived = input("   Archived repositories (include/exclude/only): ").strip().lower()
+    since = input("   Updated since (YYYY-MM-DD): ").strip()
+    
+    scope = MappingScope(
+        team_slugs=_split_list(teams),
+        repo_pattern=pattern or None,
+        topics=_split_list(topics),
+        visibility=visibility or None,
+        archived={'exclude': False, 'only': True}.get(archived),
+        updated_since=since or None
+    )
+    return None if scope.is_empty else scope
+
+
 def generate_full_mapping():
     """Generate complete team-repository mapping"""
+    from github_team_repo_mapper import GitHubAPIError, GitHubTeamRepoMapper
+    
     print("📊 Complete Team-Repository Mapping")
     print("-" * 70)
     
@@ -104,12 +141,16 @@ def generate_full_mapping():
         return
     
     try:
+        scope = prompt_mapping_scope()
         mapper = GitHubTeamRepoMapper(token, org)
         
-        print(f"🔍 Generating complete mapping for {org}...")
-        print("This will check all team-repository combinations. Please wait...\n")
+        print(f"\n🔍 Generating complete mapping for {org}...")
+        if scope:
+            print("This will check team-repository combinations inside the selected scope. Please wait...\n")
+        else:
+            print("This will check all team-repository combinations. Please wait...\n")
         
-        mapping = mapper.generate_complete_team_repo_mapping()
+        mapping = mapper.generate_complete_team_repo_mapping(scope)
         
         # Print summary
         mapper.print_summary_report(mapping)
@@ -120,12 +161,26 @@ def generate_full_mapping():
         print(f"💾 Saved detailed mapping to: {json_file}")
         print("💡 You can open this JSON file to see the detailed mapping")
         
+    except GitHubAPIError as e:
+        print(f"❌ Error: {e}")
+        save_partial_mapping(mapper, e, f"team_repo_mapping_{org}_partial.json")
     except Exception as e:
         print(f"❌ Error: {e}")
 
 
+def save_partial_mapping(mapper: 'GitHubTeamRepoMapper', error: 'GitHubAPIError', filename: str):
+    """Export the mapping completed before an API failure, if there is one"""
+    if error.partial_result is None:
+        return
+    mapper.export_mapping_to_json(error.partial_result, filename)
+    print(f"💾 Saved partial mapping ({error.partial_result['summary']['total_permissions_checked']} checks) to: {filename}")
+
+
 def bulk_assign_from_csv():
     """Load assignments from CSV and apply them"""
+    from assignment_csv import AssignmentCSVError, OrgIndex, ingest_assignment_csv
+    from github_team_repo_mapper import GitHubTeamRepoMapper
+    
     print("📋 Bulk Permission Assignment from CSV")
     print("-" * 70)
     
@@ -134,7 +189,7 @@ def bulk_assign_from_csv():
         return
     
     # Check for CSV file
-    csv_files = [f for f in os.listdir('.') if f.endswith('.csv')]
+    csv_files = [f for f in os.listdir('.') if f.endswith('.csv') and not f.endswith('_errors.csv')]
     template_files = [f for f in os.listdir('templates') if f.endswith('.csv')]
     
     if not csv_files:
@@ -158,41 +213,32 @@ def bulk_assign_from_csv():
         selected_file = csv_files[choice - 1]
         print(f"📄 Loading assignments from {selected_file}...")
         
-        # Simple CSV loading without external utilities
-        import csv
-        assignments = []
+        policy = input("If a team/repository appears more than once, keep the (l)ast row or the (m)ax permission? [l]: ").strip().lower()
+        duplicate_policy = 'max' if policy.startswith('m') else 'last'
+        
+        # Validate every row locally before any permission is changed
+        mapper = GitHubTeamRepoMapper(token, org)
+        print("🔎 Indexing organization teams and repositories for validation...")
+        index = OrgIndex.from_mapper(mapper)
         try:
-            with open(selected_file, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if all(key in row for key in ['team_slug', 'repo_owner', 'repo_name', 'permission']):
-                        assignments.append(row)
-                    else:
-                        print(f"❌ Invalid row format: {row}")
-                        return
-        except Exception as e:
+            assignments = ingest_assignment_csv(selected_file, index, duplicate_policy)
+        except AssignmentCSVError as e:
+            print(f"❌ {e}")
+            return
+        except OSError as e:
             print(f"❌ Error reading CSV: {e}")
             return
         
+        print(f"✅ Read {assignments.total_rows} rows: {len(assignments)} assignments to apply")
+        if assignments.duplicates:
+            print(f"   🔁 {assignments.duplicates} duplicate rows merged ({assignments.conflicts} conflicting, {duplicate_policy} wins)")
+        if assignments.rejected:
+            print(f"   ❌ {assignments.rejected} rows rejected, see {assignments.error_file}")
+        
         if not assignments:
             print("❌ No valid assignments found in CSV")
             return
         
-        print(f"✅ Loaded {len(assignments)} assignments")
-        
-        # Simple validation
-        valid_permissions = ['pull', 'triage', 'push', 'maintain', 'admin']
-        invalid_count = 0
-        for assignment in assignments:
-            if assignment['permission'] not in valid_permissions:
-                print(f"❌ Invalid permission '{assignment['permission']}' for team '{assignment['team_slug']}'")
-                invalid_count += 1
-        
-        if invalid_count > 0:
-            print(f"❌ Found {invalid_count} invalid assignments. Fix and try again.")
-            return
-        
-        
         # Confirm before applying
         print(f"\n⚠️  WARNING: This will modify permissions for {len(assignments)} team-repository combinations!")
         confirm = input("Do you want to continue? (yes/no): ").lower().strip()
@@ -202,7 +248,6 @@ def bulk_assign_from_csv():
             return
         
         # Apply assignments
-        mapper = GitHubTeamRepoMapper(token, org)
         results = mapper.bulk_assign_permissions(assignments)
         
         print(f"\n✅ Bulk assignment completed!")
@@ -218,8 +263,6 @@ def bulk_assign_from_csv():
     
     except ValueError:
         print("❌ Please enter a valid number")
-    except ImportError:
-        print("❌ CSV utilities not found. Please ensure utils/csv_utils.py exists.")
     except Exception as e:
         print(f"❌ Error: {e}")
 
@@ -295,6 +338,10 @@ def show_samples():
 
 def main():
     """Main menu"""
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    
     print_banner()
     
     while True:
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Aggregated Team-Repository Reports
+
+Computes report aggregates in a single pass over a mapping (the dict from
+generate_complete_team_repo_mapping, or an out-of-core EdgeStore):
+
+- role histogram
+- repositories no team has access to (no matching grant, when filtered)
+- teams with admin sprawl (admin permission, whatever the role is called,
+  on at least `admin_threshold` repositories)
+- top N teams and repositories by number of access grants
+
+Reports can be filtered by team, repository pattern and role, long lists are
+paginated, and the result is rendered as text, Markdown or JSON and written
+with a single buffered write instead of one print() per line.
+"""
+
+import heapq
+import json
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from edge_store import EdgeStore
+
+REPORT_FORMATS = ('text', 'markdown', 'json')
+
+_role_of = itemgetter('role_name')
+_repo_of = itemgetter('repo_name')
+
+
+def _has_admin(access: Dict) -> bool:
+    # Custom roles and basic (204) grants can carry admin under another role name
+    return bool(access['permissions'].get('admin'))
+
+
+@dataclass
+class ReportOptions:
+    """
+    Filters and pagination for a report
+
+    Attributes:
+        teams: Only count grants of these team slugs
+        repo_pattern: Only count grants on repositories matching this glob
+            (or 're:<regex>')
+        roles: Only count grants with these role names
+        top: Number of entries in the top-N lists
+        admin_threshold: Admin grants that make a team count as sprawling
+        page: 1-based page of the long lists (repositories without access,
+            admin sprawl)
+        page_size: Entries per page of the long lists
+    """
+    teams: Optional[List[str]] = None
+    repo_pattern: Optional[str] = None
+    roles: Optional[List[str]] = None
+    top: int = 10
+    admin_threshold: int = 10
+    page: int = 1
+    page_size: int = 50
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.teams or self.repo_pattern or self.roles)
+
+
+@dataclass
+class MappingReport:
+    """
+    Aggregates computed by build_report
+
+    When options.filtered is set, every aggregate counts only the grants
+    matching the filters, including repos_without_access.
+    """
+    organization: str
+    generated_at: str
+    summary: Dict
+    options: ReportOptions
+    grants: int = 0
+    role_histogram: Dict[str, int] = field(default_factory=dict)
+    top_teams: List[Tuple[str, int]] = field(default_factory=list)
+    top_repositories: List[Tuple[str, int]] = field(default_factory=list)
+    repos_without_access: List[str] = field(default_factory=list)
+    repos_without_access_total: int = 0
+    admin_sprawl: List[Tuple[str, int]] = field(default_factory=list)
+    admin_sprawl_total: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _page(items: List, options: ReportOptions) -> List:
+    start = (max(options.page, 1) - 1) * options.page_size
+    return items[start:start + options.page_size]
+
+
+def _iter_team_grants(source: Union[Dict, EdgeStore]
+                      ) -> Iterable[Tuple[str, Iterable[str], Iterable[str], Iterable[bool]]]:
+    """
+    Yield (team slug, repo names, role names, admin flags) per team
+
+    Each iterable may be consumed once.
+    """
+    if isinstance(source, EdgeStore):
+        roles = [role['role_name'] for role in source.meta['roles']]
+        admin = [role['permissions']['admin'] for role in source.meta['roles']]
+        repo_names = source.repo_names
+        edges = source.iter_edges()
+        edge = next(edges, None)
+        for team_index, slug in enumerate(source.team_names):
+            repos, team_roles, team_admin = [], [], []
+            while edge is not None and edge[0] == team_index:
+                repos.append(repo_names[edge[1]])
+                team_roles.append(roles[edge[2]])
+                team_admin.append(admin[edge[2]])
+                edge = next(edges, None)
+            yield slug, repos, team_roles, team_admin
+        return
+
+    for slug, team_data in source['teams'].items():
+        access = team_data['repositories_with_access']
+        yield slug, map(_repo_of, access), map(_role_of, access), map(_has_admin, access)
+
+
+def build_report(source: Union[Dict, EdgeStore], options: Optional[ReportOptions] = None) -> MappingReport:
+    """Aggregate a mapping into a MappingReport in one pass over its access grants"""
+    options = options or ReportOptions()
+    if isinstance(source, EdgeStore):
+        header = (source.meta['organization'], source.meta['generated_at'], source.summary())
+        all_repos = source.repo_names
+    else:
+        header = (source['organization'], source['generated_at'], source['summary'])
+        all_repos = list(source['repositories'])
+    report = MappingReport(*header, options=options)
+
+    team_filter = set(options.teams) if options.teams else None
+    repo_regex = None
+    if options.repo_pattern:
+        # Imported here so reports on saved mappings don't load the API client
+        from github_team_repo_mapper import compile_repo_pattern
+        repo_regex = compile_repo_pattern(options.repo_pattern)
+    role_filter = set(options.roles) if options.roles else None
+
+    roles = Counter()
+    team_grants = Counter()
+    team_admin = Counter()
+    repo_grants = Counter()
+    unfiltered_dict = not options.filtered and not isinstance(source, EdgeStore)
+    if unfiltered_dict:
+        # Per-repository totals are already the lengths of the access lists
+        for name, repo_data in source['repositories'].items():
+            if repo_data['teams_with_access']:
+                repo_grants[name] = len(repo_data['teams_with_access'])
+    for slug, repos, team_roles, admin_flags in _iter_team_grants(source):
+        if team_filter is not None and slug not in team_filter:
+            continue
+        if repo_regex is None and role_filter is None:
+            # Fast path: counting runs in C
+            counted = Counter(team_roles)
+            admin = sum(admin_flags)
+            if not unfiltered_dict:
+                repo_grants.update(repos)
+        else:
+            counted = Counter()
+            admin = 0
+            for repo, role, has_admin in zip(repos, team_roles, admin_flags):
+                if (repo_regex is None or repo_regex.search(repo)) and (role_filter is None or role in role_filter):
+                    counted[role] += 1
+                    admin += has_admin
+                    repo_grants[repo] += 1
+        roles.update(counted)
+        total = sum(counted.values())
+        if total:
+            team_grants[slug] = total
+        if admin:
+            team_admin[slug] = admin
+
+    report.grants = sum(roles.values())
+    report.role_histogram = dict(roles.most_common())
+    report.top_teams = heapq.nlargest(options.top, team_grants.items(), key=itemgetter(1))
+    report.top_repositories = heapq.nlargest(options.top, repo_grants.items(), key=itemgetter(1))
+
+    # With filters this lists repositories without a *matching* grant; the
+    # renderers label it accordingly
+    candidates = all_repos if repo_regex is None else [r for r in all_repos if repo_regex.search(r)]
+    without_access = [name for name in candidates if name not in repo_grants]
+    report.repos_without_access_total = len(without_access)
+    report.repos_without_access = _page(without_access, options)
+
+    sprawl = sorted(((slug, n) for slug, n in team_admin.items() if n >= options.admin_threshold),
+                    key=itemgetter(1), reverse=True)
+    report.admin_sprawl_total = len(sprawl)
+    report.admin_sprawl = _page(sprawl, options)
+    return report
+
+
+def _paging_note(report: MappingReport, shown: int, total: int) -> str:
+    if total <= shown and report.options.page == 1:
+        return ''
+    start = (max(report.options.page, 1) - 1) * report.options.page_size
+    return f" (showing {start + 1 if shown else 0}-{start + shown} of {total}, page {report.options.page})"
+
+
+def _render_text(report: MappingReport) -> List[str]:
+    options = report.options
+    summary = report.summary
+    lines = [
+        "=" * 80,
+        "TEAM-REPOSITORY MAPPING REPORT",
+        f"Organization: {report.organization}",
+        f"Generated: {report.generated_at}",
+        "=" * 80,
+        "",
+        "📊 SUMMARY:",
+        f"   Total Repositories: {summary['total_repositories']}",
+        f"   Total Teams: {summary['total_teams']}",
+        f"   Total Permissions Checked: {summary['total_permissions_checked']}",
+        f"   Total Access Grants: {summary['total_access_granted']}",
+    ]
+    if options.filtered:
+        lines.append(f"   Grants matching filters: {report.grants}")
+
+    lines += ["", "🔐 ROLES:"]
+    lines += [f"   {role}: {count}" for role, count in report.role_histogram.items()] or ["   (none)"]
+
+    lines += ["", f"👥 TOP {options.top} TEAMS BY GRANTS:"]
+    lines += [f"   {slug}: {count}" for slug, count in report.top_teams] or ["   (none)"]
+
+    lines += ["", f"📚 TOP {options.top} REPOSITORIES BY GRANTS:"]
+    lines += [f"   {name}: {count}" for name, count in report.top_repositories] or ["   (none)"]
+
+    lines += ["", f"⚠️  TEAMS WITH ADMIN ON {options.admin_threshold}+ REPOSITORIES: {report.admin_sprawl_total}"
+              + _paging_note(report, len(report.admin_sprawl), report.admin_sprawl_total)]
+    lines += [f"   {slug}: {count} admin grants" for slug, count in report.admin_sprawl]
+
+    heading = "REPOSITORIES WITHOUT GRANTS MATCHING FILTERS" if options.filtered else "REPOSITORIES WITHOUT TEAM ACCESS"
+    lines += ["", f"🚫 {heading}: {report.repos_without_access_total}"
+              + _paging_note(report, len(report.repos_without_access), report.repos_without_access_total)]
+    lines += [f"   {name}" for name in report.repos_without_access]
+    return lines
+
+
+def _render_markdown(report: MappingReport) -> List[str]:
+    options = report.options
+    summary = report.summary
+
+    def table(headers: Tuple[str, str], rows: Iterable[Tuple]) -> List[str]:
+        out = [f"| {headers[0]} | {headers[1]} |", "|---|---:|"]
+        out += [f"| {a} | {b} |" for a, b in rows]
+        return out if len(out) > 2 else ["_None_"]
+
+    lines = [
+        f"# Team-Repository Mapping Report: {report.organization}",
+        "",
+        f"Generated: {report.generated_at}",
+        "",
+        "## Summary",
+        "",
+    ]
+    summary_rows = [
+        ("Repositories", summary['total_repositories']),
+        ("Teams", summary['total_teams']),
+        ("Permissions checked", summary['total_permissions_checked']),
+        ("Access grants", summary['total_access_granted']),
+    ]
+    if options.filtered:
+        summary_rows.append(("Grants matching filters", report.grants))
+    lines += table(("Metric", "Value"), summary_rows)
+    lines += ["", "## Roles", ""] + table(("Role", "Grants"), report.role_histogram.items())
+    lines += ["", f"## Top {options.top} Teams", ""] + table(("Team", "Grants"), report.top_teams)
+    lines += ["", f"## Top {options.top} Repositories", ""] + table(("Repository", "Grants"), report.top_repositories)
+    lines += ["", f"## Admin Sprawl ({options.admin_threshold}+ admin grants)", "",
+              f"{report.admin_sprawl_total} teams"
+              + _paging_note(report, len(report.admin_sprawl), report.admin_sprawl_total), ""]
+    lines += table(("Team", "Admin grants"), report.admin_sprawl)
+    heading = "Repositories Without Grants Matching Filters" if options.filtered else "Repositories Without Team Access"
+    lines += ["", f"## {heading}", "",
+              f"{report.repos_without_access_total} repositories"
+              + _paging_note(report, len(report.repos_without_access), report.repos_without_access_total), ""]
+    lines += [f"- {name}" for name in report.repos_without_access]
+    return lines
+
+
+def render_report(report: MappingReport, fmt: str = 'text') -> str:
+    """Render a report as 'text', 'markdown' or 'json'"""
+    if fmt == 'json':
+        return json.dumps(report.to_dict(), indent=2, ensure_ascii=False)
+    if fmt == 'markdown':
+        return '\n'.join(_render_markdown(report))
+    if fmt == 'text':
+        return '\n'.join(_render_text(report))
+    raise ValueError(f"Unknown report format '{fmt}' (expected {', '.join(REPORT_FORMATS)})")
+
+
+def write_report(source: Union[Dict, EdgeStore], fmt: str = 'text', out: Optional[TextIO] = None,
+                 options: Optional[ReportOptions] = None):
+    """Build, render and write a report with one buffered write"""
+    out = out or sys.stdout
+    text = render_report(build_report(source, options), fmt)
+    out.write(('\n' + text if fmt == 'text' else text) + '\n')
+    out.flush()
+
+
+def _grants(source: Union[Dict, EdgeStore]) -> Dict[Tuple[str, str], str]:
+    """Map (team slug, repo name) to role name for every access grant"""
+    grants = {}
+    for slug, repos, team_roles, _ in _iter_team_grants(source):
+        for repo, role in zip(repos, team_roles):
+            grants[(slug, repo)] = role
+    return grants
+
+
+def diff_mappings(old: Union[Dict, EdgeStore], new: Union[Dict, EdgeStore]) -> Dict:
+    """
+    Compare the access grants of two mappings
+
+    Returns:
+        Dictionary with 'added', 'removed' and 'changed' lists of grants
+        (team, repo, role / old_role, new_role), sorted by team and repo
+    """
+    before = _grants(old)
+    after = _grants(new)
+    added = [{'team': t, 'repo': r, 'role': after[(t, r)]} for t, r in sorted(after.keys() - before.keys())]
+    removed = [{'team': t, 'repo': r, 'role': before[(t, r)]} for t, r in sorted(before.keys() - after.keys())]
+    changed = [
+        {'team': t, 'repo': r, 'old_role': before[(t, r)], 'new_role': after[(t, r)]}
+        for t, r in sorted(before.keys() & after.keys()) if before[(t, r)] != after[(t, r)]
+    ]
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def render_diff(diff: Dict, fmt: str = 'text') -> str:
+    """Render the result of diff_mappings as 'text', 'markdown' or 'json'"""
+    if fmt == 'json':
+        return json.dumps(diff, indent=2, ensure_ascii=False)
+    bullet = '-' if fmt == 'markdown' else '  '
+    lines = [f"{'## ' if fmt == 'markdown' else ''}Access changes: "
+             f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed"]
+    lines += [f"{bullet} + {d['team']} → {d['repo']} ({d['role']})" for d in diff['added']]
+    lines += [f"{bullet} - {d['team']} → {d['repo']} ({d['role']})" for d in diff['removed']]
+    lines += [f"{bullet} ~ {d['team']} → {d['repo']} ({d['old_role']} → {d['new_role']})" for d in diff['changed']]
+    return '\n'.join(lines)
@@ -0,0 +1,148 @@
+"""Shared fixtures for the test suite"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_cache import API_CACHE
+from github_team_repo_mapper import Repository, Team, TeamRepoPermission
+
+
+def make_repo(name: str, owner: str = 'acme', **fields) -> Repository:
+    """Build a Repository with placeholder values for the fields a test doesn't care about"""
+    values = dict(
+        id=abs(hash(name)) % 100000, name=name, full_name=f'{owner}/{name}', private=False,
+        description=None, default_branch='main', created_at='2024-01-01T00:00:00Z',
+        updated_at='2024-01-01T00:00:00Z', owner=owner
+    )
+    values.update(fields)
+    return Repository(**values)
+
+
+def make_team(slug: str, **fields) -> Team:
+    """Build a Team with placeholder values"""
+    values = dict(
+        id=abs(hash(slug)) % 100000, name=slug.title(), slug=slug, description=None,
+        privacy='closed', permission='pull', members_count=1, repos_count=0,
+        created_at='', updated_at=''
+    )
+    values.update(fields)
+    return Team(**values)
+
+
+def make_permission(team: str, repo: str, role: str = 'push', owner: str = 'acme') -> TeamRepoPermission:
+    """Build a detailed TeamRepoPermission"""
+    return TeamRepoPermission(
+        team_slug=team, team_name=team.title(), repo_name=repo, repo_full_name=f'{owner}/{repo}',
+        permission_level='detailed', role_name=role, has_admin=role == 'admin',
+        has_maintain=role in ('maintain', 'admin'), has_push=role in ('push', 'maintain', 'admin'),
+        has_triage=role != 'pull', has_pull=True
+    )
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code: int = 200, data=None, headers=None, text: str = ''):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.text = text
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture(autouse=True)
+def clear_api_cache():
+    """Keep memoized API responses from leaking between tests"""
+    API_CACHE.invalidate()
+    yield
+    API_CACHE.invalidate()
+
+
+@pytest.fixture
+def repos():
+    return [make_repo(f'repo-{i}') for i in range(5)]
+
+
+@pytest.fixture
+def teams():
+    return [make_team(slug) for slug in ('alpha', 'beta', 'gamma')]
+
+
+class FakeOrg:
+    """
+    Serves an organization's teams, repositories and team access through Session.request
+
+    grants maps (team_slug, repo_name) to a role; fail_on is a
+    (team_slug, repo_name) check answered with 401. Requests are recorded
+    as (method, url) in calls.
+    """
+
+    def __init__(self, teams, repos, grants, fail_on=None, owner: str = 'acme'):
+        self.teams = teams
+        self.repos = repos
+        self.grants = dict(grants)
+        self.fail_on = fail_on
+        self.owner = owner
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        path, _, query = url.partition('?')
+        parts = path.split('/')
+        if parts[-3] == 'repos':
+            key = (parts[-4], parts[-1])
+            if method == 'PUT':
+                self.grants[key] = kwargs['json']['permission']
+                return FakeResponse(204)
+            if key == self.fail_on:
+                return FakeResponse(401, {'message': 'Bad credentials'})
+            role = self.grants.get(key)
+            if role is None:
+                return FakeResponse(404, {'message': 'Not Found'})
+            ranks = ('pull', 'triage', 'push', 'maintain', 'admin')
+            return FakeResponse(200, {
+                'full_name': f'{self.owner}/{key[1]}', 'role_name': role,
+                'permissions': {name: rank <= ranks.index(role) for rank, name in enumerate(ranks)}
+            })
+        params = dict(param.split('=') for param in query.split('&') if param)
+        if parts[-2] == 'teams':
+            # GET /orgs/{org}/teams/{team_slug}
+            team = next((team for team in self.teams if team.slug == parts[-1]), None)
+            if team is None:
+                return FakeResponse(404, {'message': 'Not Found'})
+            return FakeResponse(200, self._team_data(team))
+        if parts[-1] == 'teams':
+            items = [self._team_data(team) for team in self.teams]
+        else:
+            repos = self.repos
+            if params.get('type') in ('public', 'private'):
+                repos = [repo for repo in repos if repo.private == (params['type'] == 'private')]
+            if params.get('sort') == 'updated':
+                repos = sorted(repos, key=lambda repo: repo.updated_at, reverse=True)
+            items = [self._repo_data(repo) for repo in repos]
+        per_page = int(params.get('per_page', 30))
+        start = (int(params.get('page', 1)) - 1) * per_page
+        return FakeResponse(200, items[start:start + per_page])
+
+    @staticmethod
+    def _team_data(team):
+        return {
+            'id': team.id, 'name': team.name, 'slug': team.slug, 'description': team.description,
+            'privacy': team.privacy, 'permission': team.permission,
+            'members_count': team.members_count, 'repos_count': team.repos_count
+        }
+
+    @staticmethod
+    def _repo_data(repo):
+        return {
+            'id': repo.id, 'name': repo.name, 'full_name': repo.full_name, 'private': repo.private,
+            'description': repo.description, 'default_branch': repo.default_branch,
+            'created_at': repo.created_at, 'updated_at': repo.updated_at, 'owner': {'login': repo.owner},
+            'archived': repo.archived, 'visibility': repo.visibility, 'topics': repo.topics
+        }
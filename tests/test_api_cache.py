@@ -0,0 +1,206 @@
+"""Tests for the TTL/LRU API cache and its use by the mapper"""
+
+import threading
+import time
+
+import pytest
+
+import api_cache
+import github_team_repo_mapper
+from api_cache import API_CACHE, TTLCache
+from conftest import FakeOrg
+from github_team_repo_mapper import GitHubTeamRepoMapper
+
+
+class FakeClock:
+    """Stands in for the time module so entries can be aged without waiting"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(api_cache, 'time', clock)
+    return clock
+
+
+def counting(value):
+    """compute() callable that counts its calls"""
+    def compute():
+        compute.calls += 1
+        return value
+    compute.calls = 0
+    return compute
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache()
+    compute = counting('teams')
+    assert cache.get_or_compute('key', compute, ttl=10) == 'teams'
+    clock.now += 9
+    assert cache.get_or_compute('key', compute, ttl=10) == 'teams'
+    assert compute.calls == 1
+    clock.now += 2
+    cache.get_or_compute('key', compute, ttl=10)
+    assert compute.calls == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.get_or_compute('a', counting(1), ttl=60)
+    cache.get_or_compute('b', counting(2), ttl=60)
+    # Reading 'a' makes 'b' the least recently used
+    cache.get_or_compute('a', counting(1), ttl=60)
+    cache.get_or_compute('c', counting(3), ttl=60)
+    assert len(cache) == 2
+
+    compute_a, compute_b = counting(1), counting(2)
+    cache.get_or_compute('a', compute_a, ttl=60)
+    cache.get_or_compute('b', compute_b, ttl=60)
+    assert (compute_a.calls, compute_b.calls) == (0, 1)
+
+
+def test_concurrent_identical_calls_are_coalesced():
+    cache = TTLCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'repos'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute, 60)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute, 60)))
+                 for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ['repos'] * 5
+
+
+def test_waiting_callers_get_the_leaders_error():
+    cache = TTLCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('boom')
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute('key', compute, 60)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ['boom'] * 3
+    # Failures are not cached
+    assert len(cache) == 0
+
+
+def test_result_racing_an_invalidation_is_not_stored():
+    cache = TTLCache()
+
+    def compute():
+        cache.invalidate()
+        return 'stale'
+
+    assert cache.get_or_compute('key', compute, 60) == 'stale'
+    assert len(cache) == 0
+
+
+@pytest.fixture
+def org(repos, teams, monkeypatch):
+    monkeypatch.setattr(github_team_repo_mapper.time, 'sleep', lambda seconds: None)
+    return FakeOrg(teams, repos, {('alpha', 'repo-0'): 'pull'})
+
+
+def org_mapper(org):
+    mapper = GitHubTeamRepoMapper('token', 'acme')
+    mapper.session.request = org.request
+    return mapper
+
+
+def test_cached_lists_are_copied_items_are_shared(org):
+    mapper = org_mapper(org)
+    first = mapper.list_organization_repositories()
+    first.pop()
+    second = mapper.list_organization_repositories()
+    assert len(second) == len(first) + 1
+    assert second[0] is first[0]
+    assert len(org.calls) == 1
+
+
+def test_permission_change_invalidates_cached_check(org):
+    mapper = org_mapper(org)
+    assert mapper.check_team_repository_permissions('alpha', 'acme', 'repo-0').role_name == 'pull'
+    assert mapper.check_team_repository_permissions('alpha', 'acme', 'repo-0').role_name == 'pull'
+    assert len(org.calls) == 1
+
+    assert mapper.add_or_update_team_repository_permissions('alpha', 'acme', 'repo-0', 'push')
+    assert mapper.check_team_repository_permissions('alpha', 'acme', 'repo-0').role_name == 'push'
+    assert [method for method, url in org.calls] == ['GET', 'PUT', 'GET']
+
+
+def test_permission_change_leaves_other_checks_cached(org):
+    mapper = org_mapper(org)
+    mapper.check_team_repository_permissions('beta', 'acme', 'repo-0')
+    mapper.add_or_update_team_repository_permissions('alpha', 'acme', 'repo-0', 'push')
+    mapper.check_team_repository_permissions('beta', 'acme', 'repo-0')
+    assert [method for method, url in org.calls] == ['GET', 'PUT']
+
+
+def test_permission_change_invalidates_other_tokens_for_same_org(org):
+    reader = GitHubTeamRepoMapper('reader-token', 'acme')
+    other_org = GitHubTeamRepoMapper('reader-token', 'other')
+    for mapper in (reader, other_org):
+        mapper.session.request = org.request
+    writer = org_mapper(org)
+
+    reader.check_team_repository_permissions('alpha', 'acme', 'repo-0')
+    other_org.check_team_repository_permissions('alpha', 'acme', 'repo-0')
+    assert len(API_CACHE) == 2
+    writer.add_or_update_team_repository_permissions('alpha', 'acme', 'repo-0', 'push')
+    # The other organization's entry is untouched
+    assert len(API_CACHE) == 1
+    assert reader.check_team_repository_permissions('alpha', 'acme', 'repo-0').role_name == 'push'
+
+
+def test_mapping_run_bypasses_the_permission_cache(org):
+    mapper = org_mapper(org)
+    mapper.generate_complete_team_repo_mapping()
+    # Only the repository and team listings are cached
+    assert len(API_CACHE) == 2
+    checks = sum(1 for method, url in org.calls if '/repos/acme/' in url)
+    mapper.generate_complete_team_repo_mapping()
+    assert sum(1 for method, url in org.calls if '/repos/acme/' in url) == 2 * checks
@@ -0,0 +1,91 @@
+"""Tests for streaming assignment CSV ingestion"""
+
+import os
+
+import pytest
+
+from assignment_csv import AssignmentCSVError, OrgIndex, ingest_assignment_csv
+
+HEADER = 'team_slug,repo_owner,repo_name,permission\n'
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(*rows, header=HEADER):
+        path = tmp_path / 'assignments.csv'
+        path.write_text(header + ''.join(row + '\n' for row in rows))
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def index():
+    return OrgIndex(team_slugs={'alpha', 'beta'}, repositories={('acme', 'repo-0'), ('acme', 'repo-1')})
+
+
+@pytest.mark.parametrize('policy, expected', [('last', 'pull'), ('max', 'admin')])
+def test_conflicting_rows_are_resolved_by_policy(write_csv, policy, expected):
+    filename = write_csv('alpha,acme,repo-0,push', 'alpha,acme,repo-0,admin', 'alpha,acme,repo-0,pull')
+    result = ingest_assignment_csv(filename, duplicate_policy=policy)
+    assert [row['permission'] for row in result] == [expected]
+    assert (result.total_rows, result.duplicates, result.conflicts) == (3, 2, 2)
+
+
+def test_identical_duplicates_are_not_conflicts(write_csv):
+    result = ingest_assignment_csv(write_csv('alpha,acme,repo-0,push', 'alpha,acme,repo-0,push'))
+    assert len(result) == 1
+    assert (result.duplicates, result.conflicts) == (1, 0)
+
+
+def test_unknown_policy_is_rejected(write_csv):
+    with pytest.raises(ValueError):
+        ingest_assignment_csv(write_csv(), duplicate_policy='first')
+
+
+def test_keys_are_case_insensitive(write_csv, index):
+    filename = write_csv('Alpha,ACME,Repo-0,push', 'alpha,acme,repo-0,maintain')
+    result = ingest_assignment_csv(filename, index)
+    assert list(result.assignments) == [('alpha', 'acme', 'repo-0')]
+    assert result.rejected == 0
+    assert [row['permission'] for row in result] == ['maintain']
+
+
+def test_comments_and_blank_lines_are_skipped(write_csv):
+    filename = write_csv('# alpha,acme,repo-0,admin', '', '   ', 'beta,acme,repo-1,pull', '  # trailing note')
+    result = ingest_assignment_csv(filename)
+    assert result.total_rows == 1
+    assert [row['team_slug'] for row in result] == ['beta']
+
+
+def test_invalid_rows_are_written_to_error_file(write_csv, index):
+    filename = write_csv(
+        'alpha,acme,repo-0,push',
+        'delta,acme,repo-0,push',
+        'beta,acme,repo-9,push',
+        'beta,acme,repo-1,owner',
+        'beta,,repo-1,push',
+    )
+    result = ingest_assignment_csv(filename, index)
+    assert len(result) == 1
+    assert result.rejected == 4
+    with open(result.error_file) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'line,team_slug,repo_owner,repo_name,permission,error'
+    assert lines[1].startswith('3,delta,') and "unknown team 'delta'" in lines[1]
+    assert "unknown repository 'acme/repo-9'" in lines[2]
+    assert "invalid permission 'owner'" in lines[3]
+    assert lines[4].endswith('empty repo_owner')
+
+
+def test_error_file_from_previous_run_is_removed(write_csv, index):
+    failing = ingest_assignment_csv(write_csv('delta,acme,repo-0,push'), index)
+    assert os.path.exists(failing.error_file)
+
+    clean = ingest_assignment_csv(write_csv('alpha,acme,repo-0,push'), index)
+    assert clean.error_file is None
+    assert not os.path.exists(failing.error_file)
+
+
+def test_missing_column_is_rejected(write_csv):
+    with pytest.raises(AssignmentCSVError, match='permission'):
+        ingest_assignment_csv(write_csv(header='team_slug,repo_owner,repo_name\n'))
@@ -0,0 +1,52 @@
+"""Tests for command-line exit codes"""
+
+import json
+
+import pytest
+
+import cli
+import github_team_repo_mapper
+from conftest import FakeResponse
+from edge_store import EdgeStore
+
+
+@pytest.fixture
+def credentials(monkeypatch):
+    monkeypatch.setenv('GITHUB_TOKEN', 'token')
+    monkeypatch.setenv('GITHUB_ORG', 'acme')
+
+
+def respond_with(monkeypatch, response):
+    monkeypatch.setattr(github_team_repo_mapper.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(github_team_repo_mapper.requests.Session, 'request',
+                        lambda self, method, url, **kwargs: response, raising=False)
+
+
+def test_api_error_exits_with_api_error_code(credentials, monkeypatch, capsys):
+    respond_with(monkeypatch, FakeResponse(401, {'message': 'Bad credentials'}))
+    assert cli.main(['overview', '--json']) == cli.EXIT_API_ERROR
+    result = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert result['ok'] is False
+
+
+def test_error_named_like_an_api_error_is_not_one(credentials, monkeypatch):
+    class GitHubAPIError(Exception):
+        pass
+
+    def fail(args, out):
+        raise GitHubAPIError('not from the API client')
+
+    monkeypatch.setattr(cli, 'cmd_overview', fail)
+    assert cli.main(['overview']) == cli.EXIT_ERROR
+
+
+def test_store_without_metadata_is_a_usage_error(tmp_path, capsys):
+    path = str(tmp_path / 'store')
+    # An interrupted run: files created, meta.json never written
+    EdgeStore.create(path, 'acme')
+    assert cli.main(['report', path]) == cli.EXIT_USAGE
+    assert 'Cannot open mapping store' in capsys.readouterr().err
+
+
+def test_unreadable_mapping_file_is_a_usage_error(tmp_path):
+    assert cli.main(['report', str(tmp_path / 'missing.json')]) == cli.EXIT_USAGE
@@ -0,0 +1,106 @@
+"""Tests for the Parquet/Arrow table exports and the CSV role matrix"""
+
+import csv
+
+import pytest
+
+import github_team_repo_mapper
+from columnar_export import export_mapping_to_columnar, export_role_matrix_csv
+from conftest import FakeOrg
+from github_team_repo_mapper import GitHubTeamRepoMapper
+
+GRANTS = {
+    ('alpha', 'repo-0'): 'admin',
+    ('alpha', 'repo-3'): 'push',
+    ('beta', 'repo-1'): 'pull',
+    ('gamma', 'repo-0'): 'maintain',
+    ('gamma', 'repo-2'): 'push',
+    ('gamma', 'repo-4'): 'triage',
+}
+
+
+@pytest.fixture
+def sources(tmp_path, repos, teams, monkeypatch):
+    """The same organization mapped in memory and into an EdgeStore"""
+    monkeypatch.setattr(github_team_repo_mapper.time, 'sleep', lambda seconds: None)
+    mapper = GitHubTeamRepoMapper('token', 'acme')
+    mapper.session.request = FakeOrg(teams, repos, GRANTS).request
+    return {
+        'dict': mapper.generate_complete_team_repo_mapping(),
+        'store': mapper.generate_team_repo_mapping_to_disk(str(tmp_path / 'store')),
+    }
+
+
+def expected_edges(repos, teams):
+    """(team_id, repo_id, role) in team order, as a single-process run records them"""
+    return [(team.id, repo.id, GRANTS[(team.slug, repo.name)])
+            for team in teams for repo in repos if (team.slug, repo.name) in GRANTS]
+
+
+def read_tables(paths, fmt):
+    pa = pytest.importorskip('pyarrow')
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        files = {name: pq.ParquetFile(path) for name, path in paths.items()}
+        return ({name: f.read() for name, f in files.items()},
+                {name: f.num_row_groups for name, f in files.items()})
+    import pyarrow.ipc as ipc
+    readers = {name: ipc.open_file(pa.memory_map(path)) for name, path in paths.items()}
+    return ({name: reader.read_all() for name, reader in readers.items()},
+            {name: reader.num_record_batches for name, reader in readers.items()})
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+@pytest.mark.parametrize('kind', ['dict', 'store'])
+def test_columnar_round_trip(tmp_path, sources, repos, teams, kind, fmt):
+    pytest.importorskip('pyarrow')
+    paths = export_mapping_to_columnar(sources[kind], str(tmp_path / 'out'), fmt, row_group_size=2)
+    tables, groups = read_tables(paths, fmt)
+
+    edges = tables['edges']
+    assert edges.column_names == ['team_id', 'repo_id', 'role']
+    assert list(zip(*(edges.column(name).to_pylist() for name in edges.column_names))) == \
+        expected_edges(repos, teams)
+    # One role dictionary shared by every row group, in first-seen order
+    dictionaries = {tuple(chunk.dictionary.to_pylist()) for chunk in edges.column('role').chunks}
+    assert dictionaries == {('admin', 'push', 'pull', 'maintain', 'triage')}
+
+    assert tables['teams'].to_pylist() == [{
+        'team_id': team.id, 'slug': team.slug, 'name': team.name, 'description': team.description,
+        'privacy': team.privacy, 'default_permission': team.permission,
+        'members_count': team.members_count, 'repos_count': team.repos_count
+    } for team in teams]
+    assert tables['repos'].to_pylist() == [{
+        'repo_id': repo.id, 'name': repo.name, 'full_name': repo.full_name, 'private': repo.private,
+        'description': repo.description, 'default_branch': repo.default_branch
+    } for repo in repos]
+
+    # 6 edges, 3 teams and 5 repositories in groups of 2
+    assert groups == {'edges': 3, 'teams': 2, 'repos': 3}
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_dict_and_store_sources_export_identical_tables(tmp_path, sources, fmt):
+    pytest.importorskip('pyarrow')
+    exported = {}
+    for kind, source in sources.items():
+        paths = export_mapping_to_columnar(source, str(tmp_path / kind), fmt, row_group_size=2)
+        exported[kind] = read_tables(paths, fmt)[0]
+    for name in ('edges', 'teams', 'repos'):
+        assert exported['dict'][name].equals(exported['store'][name]), name
+
+
+def test_unknown_format_is_rejected(tmp_path, sources):
+    with pytest.raises(ValueError):
+        export_mapping_to_columnar(sources['dict'], str(tmp_path / 'out'), 'orc')
+
+
+@pytest.mark.parametrize('kind', ['dict', 'store'])
+def test_role_matrix_csv(tmp_path, sources, repos, teams, kind):
+    filename = str(tmp_path / 'matrix.csv')
+    export_role_matrix_csv(sources[kind], filename)
+    with open(filename, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['team_slug'] + [repo.name for repo in repos]
+    assert rows[1:] == [[team.slug] + [GRANTS.get((team.slug, repo.name), '') for repo in repos]
+                        for team in teams]
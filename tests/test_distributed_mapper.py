@@ -0,0 +1,159 @@
+"""Tests for the SQLite shard queue, lease heartbeat and result merging"""
+
+import time
+from dataclasses import asdict
+
+import pytest
+
+from conftest import make_permission
+from distributed_mapper import LeaseHeartbeat, ShardQueue, merge_results
+
+
+@pytest.fixture
+def queue(tmp_path, repos, teams):
+    queue = ShardQueue(str(tmp_path / 'queue.db'), lease_seconds=60, max_attempts=2)
+    queue.plan('acme', repos, teams, repos_per_shard=2)
+    yield queue
+    queue.close()
+
+
+def test_plan_creates_shards_per_team_and_repo_page(queue):
+    # 3 teams × ceil(5 / 2) pages
+    assert queue.counts() == {'pending': 9, 'leased': 0, 'done': 0, 'failed': 0}
+
+
+def test_queue_uses_rollback_journal_unless_wal_is_requested(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    queue = ShardQueue(path)
+    assert queue.journal_mode == 'delete'
+    queue.close()
+
+    ShardQueue(path, wal=True).close()
+    # Workers open the queue without choosing a mode and keep the planner's
+    worker = ShardQueue(path)
+    assert worker.journal_mode == 'wal'
+    worker.close()
+
+    queue = ShardQueue(path, wal=False)
+    assert queue.journal_mode == 'delete'
+    queue.close()
+
+
+def test_claim_hands_out_shards_in_order_once(queue):
+    first = queue.claim('w1')
+    second = queue.claim('w2')
+    assert (first.id, first.team_index, first.repo_start, first.repo_end) == (1, 0, 0, 2)
+    assert second.id == 2
+    assert first.attempts == 1
+    assert queue.counts()['leased'] == 2
+
+
+def test_expired_lease_is_claimed_again(queue):
+    queue.lease_seconds = 0.05
+    shard = queue.claim('w1')
+    time.sleep(0.1)
+    again = queue.claim('w2')
+    assert again.id == shard.id
+    assert again.attempts == 2
+    # The first worker lost the lease and can no longer complete the shard
+    assert not queue.renew(shard.id, 'w1')
+    assert not queue.complete(shard.id, 'w1', {})
+    assert queue.complete(shard.id, 'w2', {})
+
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    queue.lease_seconds = 0.01
+    shard = queue.claim('w1')
+    time.sleep(0.05)
+    assert queue.claim('w2').id == shard.id
+    time.sleep(0.05)
+    # Third claim: attempts are used up, so the shard is failed and the next one handed out
+    assert queue.claim('w3').id == shard.id + 1
+    row = queue.conn.execute("SELECT status, error FROM shards WHERE id = ?", (shard.id,)).fetchone()
+    assert row == ('failed', 'lease expired')
+
+
+def test_fail_requeues_until_attempts_are_used_up(queue):
+    shard = queue.claim('w1')
+    queue.fail(shard.id, 'w1', 'boom')
+    assert queue.counts()['pending'] == 9
+    assert queue.claim('w1').id == shard.id
+    queue.fail(shard.id, 'w1', 'boom again')
+    assert queue.counts()['failed'] == 1
+
+
+def test_reset_failed_restores_attempt_budget(queue):
+    shard = queue.claim('w1')
+    queue.fail(shard.id, 'w1', 'boom')
+    queue.claim('w1')
+    queue.fail(shard.id, 'w1', 'boom')
+    assert queue.reset_failed() == 1
+    claimed = queue.claim('w1')
+    assert claimed.id == shard.id
+    assert claimed.attempts == 1
+
+
+def lease_expiry(queue, shard_id):
+    return queue.conn.execute("SELECT lease_expires FROM shards WHERE id = ?", (shard_id,)).fetchone()[0]
+
+
+def test_heartbeat_renews_lease_while_worker_is_busy(tmp_path, repos, teams):
+    path = str(tmp_path / 'queue.db')
+    queue = ShardQueue(path, lease_seconds=600)
+    queue.plan('acme', repos, teams, repos_per_shard=5)
+    shard = queue.claim('w1')
+    claimed_until = lease_expiry(queue, shard.id)
+    # A long lease renewed every 10ms: the test waits for renewals, not for a deadline
+    with LeaseHeartbeat(path, shard.id, 'w1', 600, interval=0.01) as heartbeat:
+        deadline = time.monotonic() + 10
+        while lease_expiry(queue, shard.id) == claimed_until and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert lease_expiry(queue, shard.id) > claimed_until
+        assert not heartbeat.lost.is_set()
+    assert queue.claim('w2').id != shard.id
+    assert queue.complete(shard.id, 'w1', {})
+    queue.close()
+
+
+def test_heartbeat_reports_lost_lease(tmp_path, repos, teams):
+    path = str(tmp_path / 'queue.db')
+    queue = ShardQueue(path, lease_seconds=600)
+    queue.plan('acme', repos, teams, repos_per_shard=5)
+    shard = queue.claim('w1')
+    # Another worker took the shard over
+    queue.conn.execute("UPDATE shards SET lease_owner = 'w2' WHERE id = ?", (shard.id,))
+    with LeaseHeartbeat(path, shard.id, 'w1', 600, interval=0.01) as heartbeat:
+        assert heartbeat.lost.wait(10)
+    queue.close()
+
+
+def test_heartbeat_interval_defaults_to_a_third_of_the_lease(tmp_path):
+    assert LeaseHeartbeat(str(tmp_path / 'queue.db'), 1, 'w1', 300).interval == 100
+
+
+def test_merge_refuses_unfinished_queue(queue):
+    with pytest.raises(RuntimeError):
+        merge_results(queue)
+
+
+def test_merge_follows_shard_order_not_completion_order(queue, repos, teams):
+    shards = []
+    while True:
+        shard = queue.claim('w1')
+        if shard is None:
+            break
+        shards.append(shard)
+    # Complete in reverse; every team gets push access to every even repository
+    for shard in reversed(shards):
+        team = teams[shard.team_index]
+        result = {
+            repo.name: asdict(make_permission(team.slug, repo.name))
+            for repo in repos[shard.repo_start:shard.repo_end] if int(repo.name[-1]) % 2 == 0
+        }
+        assert queue.complete(shard.id, 'w1', result)
+
+    mapping = merge_results(queue)
+    assert mapping['summary']['total_permissions_checked'] == 15
+    assert mapping['summary']['total_access_granted'] == 9
+    matrix = [(row['team_slug'], row['repo_name']) for row in mapping['permissions_matrix']]
+    assert matrix == [(team.slug, f'repo-{i}') for team in teams for i in (0, 2, 4)]
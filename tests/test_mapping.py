@@ -0,0 +1,90 @@
+"""Tests for the in-memory and out-of-core mapping runs"""
+
+import json
+
+import pytest
+
+import github_team_repo_mapper
+from conftest import FakeOrg
+from edge_store import EdgeStore
+from github_team_repo_mapper import GitHubAPIError, GitHubTeamRepoMapper
+
+GRANTS = {
+    ('alpha', 'repo-0'): 'admin',
+    ('alpha', 'repo-3'): 'push',
+    ('beta', 'repo-1'): 'pull',
+    ('gamma', 'repo-0'): 'maintain',
+    ('gamma', 'repo-4'): 'triage',
+}
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    monkeypatch.setattr(github_team_repo_mapper.time, 'sleep', lambda seconds: None)
+
+
+def org_mapper(org):
+    mapper = GitHubTeamRepoMapper('token', 'acme')
+    mapper.session.request = org.request
+    return mapper
+
+
+def exported(tmp_path, name, write):
+    filename = str(tmp_path / name)
+    write(filename)
+    with open(filename) as f:
+        document = json.load(f)
+    del document['generated_at']
+    return document
+
+
+def test_in_memory_and_on_disk_runs_agree(tmp_path, repos, teams):
+    mapper = org_mapper(FakeOrg(teams, repos, GRANTS))
+    mapping = mapper.generate_complete_team_repo_mapping()
+    store = mapper.generate_team_repo_mapping_to_disk(str(tmp_path / 'store'))
+
+    assert mapping['summary']['total_permissions_checked'] == 15
+    assert mapping['summary']['total_access_granted'] == 5
+    assert store.summary() == mapping['summary']
+    assert (exported(tmp_path, 'store.json', store.export_json) ==
+            exported(tmp_path, 'mapping.json', lambda f: mapper.export_mapping_to_json(mapping, f)))
+
+
+@pytest.mark.parametrize('to_disk', [False, True])
+def test_failed_check_keeps_partial_result(tmp_path, repos, teams, to_disk):
+    mapper = org_mapper(FakeOrg(teams, repos, GRANTS, fail_on=('beta', 'repo-2')))
+    with pytest.raises(GitHubAPIError) as excinfo:
+        if to_disk:
+            mapper.generate_team_repo_mapping_to_disk(str(tmp_path / 'store'))
+        else:
+            mapper.generate_complete_team_repo_mapping()
+
+    partial = excinfo.value.partial_result
+    summary = partial.summary() if to_disk else partial['summary']
+    # alpha's five checks and beta's first two
+    assert summary['total_permissions_checked'] == 7
+    assert summary['total_access_granted'] == 3
+    assert summary['incomplete'] is True
+
+
+def test_partial_store_export_keeps_incomplete_marker(tmp_path, repos, teams):
+    mapper = org_mapper(FakeOrg(teams, repos, GRANTS, fail_on=('alpha', 'repo-4')))
+    with pytest.raises(GitHubAPIError) as excinfo:
+        mapper.generate_team_repo_mapping_to_disk(str(tmp_path / 'store'))
+
+    document = exported(tmp_path, 'partial.json', excinfo.value.partial_result.export_json)
+    assert document['summary']['incomplete'] is True
+
+
+def test_create_discards_previous_store_metadata(tmp_path):
+    path = str(tmp_path / 'store')
+    old = EdgeStore.create(path, 'acme')
+    old.add_team({'slug': 'alpha'})
+    old.close()
+
+    store = EdgeStore.create(path, 'acme')
+    # Until the new run closes, the directory must not look like a finished store
+    with pytest.raises(FileNotFoundError):
+        EdgeStore.open(path)
+    store.close()
+    assert EdgeStore.open(path).meta['total_teams'] == 0
@@ -0,0 +1,167 @@
+"""Tests for the tracer, the null tracer and the CLI --profile mode"""
+
+import json
+
+import pytest
+
+import cli
+import github_team_repo_mapper
+import profiling
+from conftest import FakeOrg
+from profiling import NULL_TRACER, Tracer, profile_run
+
+
+class FakeClock:
+    """Stands in for the time module; wall and CPU time advance only when told to"""
+
+    def __init__(self):
+        self.wall = 100.0
+        self.cpu = 10.0
+
+    def perf_counter(self):
+        return self.wall
+
+    def thread_time(self):
+        return self.cpu
+
+    def advance(self, wall, cpu=0.0):
+        self.wall += wall
+        self.cpu += cpu
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(profiling, 'time', clock)
+    return clock
+
+
+def stats(tracer):
+    return {row['name']: row for row in tracer.breakdown()}
+
+
+def test_self_time_excludes_nested_spans(clock):
+    tracer = Tracer()
+    with tracer.span('outer'):
+        clock.advance(1.0, cpu=0.5)
+        with tracer.span('inner', 'http'):
+            clock.advance(2.0, cpu=0.25)
+            with tracer.span('innermost'):
+                clock.advance(0.5)
+        with tracer.span('inner', 'http'):
+            clock.advance(3.0)
+
+    rows = stats(tracer)
+    assert rows['outer'] == {'name': 'outer', 'category': 'phase', 'count': 1,
+                             'wall_s': 6.5, 'self_s': 1.0, 'cpu_s': 0.75}
+    assert rows['inner'] == {'name': 'inner', 'category': 'http', 'count': 2,
+                             'wall_s': 5.5, 'self_s': 5.0, 'cpu_s': 0.25}
+    assert rows['innermost']['self_s'] == 0.5
+    # Slowest first
+    assert [row['name'] for row in tracer.breakdown()] == ['outer', 'inner', 'innermost']
+
+
+def test_span_is_recorded_when_block_raises(clock):
+    tracer = Tracer()
+    with pytest.raises(RuntimeError):
+        with tracer.span('failing'):
+            clock.advance(1.0)
+            raise RuntimeError('boom')
+    assert stats(tracer)['failing']['wall_s'] == 1.0
+
+
+def test_events_are_capped_but_stats_are_complete(clock):
+    tracer = Tracer(max_events=3)
+    for _ in range(5):
+        with tracer.span('request', 'http'):
+            clock.advance(0.1)
+    assert len(tracer.events) == 3
+    assert tracer.dropped == 2
+    assert stats(tracer)['request']['count'] == 5
+    assert '2 spans not written to the trace file, limit 3' in tracer.render_breakdown()
+
+
+def test_chrome_trace_shape(tmp_path, clock):
+    tracer = Tracer()
+    with tracer.span('outer'):
+        clock.advance(0.001)
+        with tracer.span('http_request', 'http', method='GET'):
+            clock.advance(0.002)
+    filename = str(tmp_path / 'trace.json')
+    tracer.write_chrome_trace(filename)
+
+    with open(filename) as f:
+        trace = json.load(f)
+    assert trace['displayTimeUnit'] == 'ms'
+    metadata = [event for event in trace['traceEvents'] if event['ph'] == 'M']
+    spans = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    assert [event['name'] for event in metadata] == ['thread_name']
+    assert metadata[0]['args']['name'] == 'MainThread'
+    # Events are written as spans end, inner first; times are microseconds from the tracer's start
+    inner, outer = spans
+    assert inner == {'name': 'http_request', 'cat': 'http', 'ph': 'X', 'ts': 1000.0, 'dur': 2000.0,
+                     'pid': outer['pid'], 'tid': metadata[0]['tid'], 'args': {'method': 'GET'}}
+    assert (outer['name'], outer['ts'], outer['dur']) == ('outer', 0.0, 3000.0)
+    assert 'args' not in outer
+    assert tracer.files == [filename]
+
+
+def test_wrap_runs_function_in_span(clock):
+    tracer = Tracer()
+
+    def double(value):
+        clock.advance(1.0)
+        return value * 2
+
+    traced = tracer.wrap(double, 'double', 'build')
+    assert traced(21) == 42
+    assert traced.__name__ == 'double'
+    assert stats(tracer)['double']['category'] == 'build'
+
+
+def test_null_tracer_adds_nothing():
+    def func():
+        pass
+
+    assert NULL_TRACER.wrap(func, 'func') is func
+    assert NULL_TRACER.span('a') is NULL_TRACER.span('b')
+    assert not NULL_TRACER.enabled
+    with NULL_TRACER.span('phase'):
+        pass
+
+
+def test_profile_run_rejects_unknown_profiler(tmp_path):
+    with pytest.raises(ValueError):
+        with profile_run(str(tmp_path / 'trace.json'), 'perf'):
+            pass
+
+
+def test_profile_run_writes_profiler_output_next_to_trace(tmp_path):
+    trace_file = str(tmp_path / 'trace.json')
+    with profile_run(trace_file, 'cprofile') as tracer:
+        sum(range(1000))
+    assert tracer.files == [str(tmp_path / 'trace.prof'), trace_file]
+    assert stats(tracer)['run']['count'] == 1
+
+
+def test_cli_profile_writes_trace_and_emits_profile_event(tmp_path, repos, teams, monkeypatch, capsys):
+    monkeypatch.setenv('GITHUB_TOKEN', 'token')
+    monkeypatch.setenv('GITHUB_ORG', 'acme')
+    org = FakeOrg(teams, repos, {})
+    monkeypatch.setattr(github_team_repo_mapper.requests.Session, 'request',
+                        lambda self, method, url, **kwargs: org.request(method, url, **kwargs), raising=False)
+    trace_file = str(tmp_path / 'trace.json')
+
+    assert cli.main(['overview', '--json', '--profile', trace_file]) == cli.EXIT_OK
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    profile = next(event for event in events if event['event'] == 'profile')
+    assert profile['files'] == [trace_file]
+    spans = {row['name']: row for row in profile['spans']}
+    assert spans['cli.overview']['category'] == 'command'
+    assert spans['http_request']['count'] == len(org.calls)
+    assert events[-1]['event'] == 'result' and events[-1]['ok'] is True
+
+    with open(trace_file) as f:
+        names = {event['name'] for event in json.load(f)['traceEvents']}
+    assert {'run', 'cli.overview', 'http_request', 'decode_json'} <= names
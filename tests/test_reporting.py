@@ -0,0 +1,97 @@
+"""Tests for report aggregation and rendering"""
+
+from dataclasses import replace
+
+import pytest
+
+from conftest import make_permission
+from edge_store import EdgeStore
+from github_team_repo_mapper import GitHubTeamRepoMapper
+from reporting import ReportOptions, build_report, diff_mappings, render_report
+
+
+@pytest.fixture
+def mapping(repos, teams):
+    mapper = GitHubTeamRepoMapper('token', 'acme')
+    mapping = mapper._new_mapping(repos, teams)
+    grants = {('alpha', 'repo-0'): 'admin', ('alpha', 'repo-1'): 'push', ('beta', 'repo-1'): 'pull'}
+    for team in teams:
+        for repo in repos:
+            role = grants.get((team.slug, repo.name))
+            mapper._record_permission(mapping, team, repo,
+                                      make_permission(team.slug, repo.name, role) if role else None)
+    return mapping
+
+
+def test_unfiltered_report_lists_repositories_without_team_access(mapping):
+    report = build_report(mapping)
+    assert report.grants == 3
+    assert report.repos_without_access == ['repo-2', 'repo-3', 'repo-4']
+    assert "REPOSITORIES WITHOUT TEAM ACCESS: 3" in render_report(report)
+    assert "## Repositories Without Team Access" in render_report(report, 'markdown')
+
+
+@pytest.mark.parametrize('options, expected', [
+    (ReportOptions(roles=['admin']), ['repo-1', 'repo-2', 'repo-3', 'repo-4']),
+    (ReportOptions(teams=['beta']), ['repo-0', 'repo-2', 'repo-3', 'repo-4']),
+    (ReportOptions(repo_pattern='repo-[0-2]'), ['repo-2']),
+])
+def test_filtered_report_labels_repositories_without_matching_grants(mapping, options, expected):
+    report = build_report(mapping, options)
+    assert report.repos_without_access == expected
+    text = render_report(report)
+    assert "WITHOUT TEAM ACCESS" not in text
+    assert f"REPOSITORIES WITHOUT GRANTS MATCHING FILTERS: {len(expected)}" in text
+    assert "## Repositories Without Grants Matching Filters" in render_report(report, 'markdown')
+
+
+@pytest.fixture
+def sprawl_sources(tmp_path, repos, teams):
+    """alpha: admin role on two repositories; beta: admin permission under other role names on three"""
+    roles = {
+        ('alpha', 'repo-0'): 'admin', ('alpha', 'repo-1'): 'admin', ('alpha', 'repo-2'): 'push',
+        ('beta', 'repo-0'): 'unknown', ('beta', 'repo-1'): 'owner', ('beta', 'repo-2'): 'owner',
+        ('gamma', 'repo-3'): 'maintain',
+    }
+    mapper = GitHubTeamRepoMapper('token', 'acme')
+    mapping = mapper._new_mapping(repos, teams)
+    store = EdgeStore.create(str(tmp_path / 'store'), 'acme')
+    for repo in repos:
+        store.add_repository({'name': repo.name, 'full_name': repo.full_name})
+    for team in teams:
+        store.add_team({'slug': team.slug, 'name': team.name})
+    for team_index, team in enumerate(teams):
+        for repo_index, repo in enumerate(repos):
+            role = roles.get((team.slug, repo.name))
+            permission = None
+            if role:
+                granted = 'admin' if role in ('admin', 'unknown', 'owner') else role
+                permission = replace(make_permission(team.slug, repo.name, granted), role_name=role)
+            mapper._record_permission(mapping, team, repo, permission)
+            store.record_check(team_index, repo_index, permission)
+    store.close()
+    return {'dict': mapping, 'store': EdgeStore.open(str(tmp_path / 'store'))}
+
+
+@pytest.mark.parametrize('kind', ['dict', 'store'])
+@pytest.mark.parametrize('options', [ReportOptions(admin_threshold=2), ReportOptions(admin_threshold=2, repo_pattern='*')])
+def test_admin_sprawl_counts_admin_permission_not_role_name(sprawl_sources, kind, options):
+    report = build_report(sprawl_sources[kind], options)
+    assert report.admin_sprawl == [('beta', 3), ('alpha', 2)]
+    assert report.role_histogram['admin'] == 2
+
+
+@pytest.mark.parametrize('kind', ['dict', 'store'])
+def test_diff_mappings(sprawl_sources, mapping, kind):
+    diff = diff_mappings(mapping, sprawl_sources[kind])
+    assert diff['added'] == [
+        {'team': 'alpha', 'repo': 'repo-2', 'role': 'push'},
+        {'team': 'beta', 'repo': 'repo-0', 'role': 'unknown'},
+        {'team': 'beta', 'repo': 'repo-2', 'role': 'owner'},
+        {'team': 'gamma', 'repo': 'repo-3', 'role': 'maintain'},
+    ]
+    assert diff['removed'] == []
+    assert diff['changed'] == [
+        {'team': 'alpha', 'repo': 'repo-1', 'old_role': 'push', 'new_role': 'admin'},
+        {'team': 'beta', 'repo': 'repo-1', 'old_role': 'pull', 'new_role': 'owner'},
+    ]
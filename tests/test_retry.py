@@ -0,0 +1,145 @@
+"""Tests for request retries, rate-limit handling and the circuit breaker"""
+
+import time
+
+import pytest
+import requests
+
+import github_team_repo_mapper
+from conftest import FakeResponse
+from github_team_repo_mapper import (GitHubAPIError, GitHubTeamRepoMapper, RateLimitError,
+                                     RetryPolicy, TransientAPIError)
+
+URL = 'https://api.github.com/orgs/acme/teams'
+
+
+class FakeTime:
+    """time module stand-in that records sleeps instead of sleeping"""
+
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(github_team_repo_mapper, 'time', clock)
+    return clock
+
+
+def scripted_mapper(responses, **policy):
+    """Mapper whose session returns (or raises) the given responses in order"""
+    mapper = GitHubTeamRepoMapper('token', 'acme', retry_policy=RetryPolicy(**policy), use_cache=False)
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(method)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    mapper.session.request = request
+    return mapper, calls
+
+
+def test_server_error_is_retried_then_succeeds(clock):
+    mapper, calls = scripted_mapper([FakeResponse(502), FakeResponse(503), FakeResponse(200, [])],
+                                    backoff_base=1.0)
+    assert mapper._make_request(URL).status_code == 200
+    assert len(calls) == 3
+    # Full jitter: each delay is within [0, base * 2^attempt]
+    assert len(clock.sleeps) == 2
+    assert 0 <= clock.sleeps[0] <= 1.0 and 0 <= clock.sleeps[1] <= 2.0
+
+
+def test_connection_error_is_retried(clock):
+    mapper, calls = scripted_mapper([requests.exceptions.ConnectionError('reset'), FakeResponse(200, [])])
+    assert mapper._make_request(URL).status_code == 200
+    assert len(calls) == 2
+
+
+def test_exhausted_retries_raise_transient_error(clock):
+    mapper, calls = scripted_mapper([FakeResponse(500) for _ in range(3)], max_retries=2)
+    with pytest.raises(TransientAPIError) as error:
+        mapper._make_request(URL)
+    assert error.value.status_code == 500
+    assert len(calls) == 3
+
+
+def test_post_is_not_retried(clock):
+    mapper, calls = scripted_mapper([FakeResponse(502), FakeResponse(200)])
+    with pytest.raises(TransientAPIError):
+        mapper._make_request(URL, method='POST', data={})
+    assert calls == ['POST']
+    assert clock.sleeps == []
+
+
+def test_client_error_raises_without_retry(clock):
+    mapper, calls = scripted_mapper([FakeResponse(404, text='Not Found')])
+    with pytest.raises(GitHubAPIError) as error:
+        mapper._make_request(URL)
+    assert type(error.value) is GitHubAPIError
+    assert error.value.status_code == 404
+    assert len(calls) == 1
+
+
+def test_retry_after_header_is_honoured(clock):
+    mapper, _ = scripted_mapper([FakeResponse(429, headers={'Retry-After': '7'}), FakeResponse(200, [])])
+    assert mapper._make_request(URL).status_code == 200
+    assert clock.sleeps == [7]
+
+
+def test_rate_limit_wait_is_capped(clock):
+    mapper, _ = scripted_mapper([FakeResponse(429, headers={'Retry-After': '99999'}), FakeResponse(200, [])],
+                                max_rate_limit_wait=60)
+    mapper._make_request(URL)
+    assert clock.sleeps == [60]
+
+
+def test_primary_rate_limit_waits_for_reset(clock):
+    reset = int(time.time()) + 20
+    limited = FakeResponse(403, headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)})
+    mapper, _ = scripted_mapper([limited, FakeResponse(200, [])])
+    mapper._make_request(URL)
+    assert 19 <= clock.sleeps[0] <= 22
+
+
+def test_rate_limit_error_after_max_waits(clock):
+    limited = FakeResponse(429, headers={'Retry-After': '1'})
+    mapper, calls = scripted_mapper([limited] * 3, max_rate_limit_waits=2)
+    with pytest.raises(RateLimitError):
+        mapper._make_request(URL)
+    assert len(calls) == 3
+    assert clock.sleeps == [1, 1]
+
+
+def test_circuit_breaker_opens_on_failure_rate(clock):
+    mapper, calls = scripted_mapper([FakeResponse(500), FakeResponse(500), FakeResponse(200, [])],
+                                    max_retries=0, breaker_window=4, breaker_threshold=0.5,
+                                    breaker_cooldown=30)
+    for _ in range(2):
+        with pytest.raises(TransientAPIError):
+            mapper._make_request(URL)
+    assert clock.sleeps == []
+    # Two failures out of the half-window observed: the next request waits out the cooldown
+    assert mapper._make_request(URL).status_code == 200
+    assert len(clock.sleeps) == 1 and 29 <= clock.sleeps[0] <= 30
+
+
+def test_circuit_breaker_stays_closed_below_threshold(clock):
+    responses = [FakeResponse(200, [])] * 3 + [FakeResponse(500)] + [FakeResponse(200, [])] * 2
+    mapper, _ = scripted_mapper(responses, max_retries=0, breaker_window=4, breaker_threshold=0.5)
+    for _ in range(3):
+        mapper._make_request(URL)
+    with pytest.raises(TransientAPIError):
+        mapper._make_request(URL)
+    mapper._make_request(URL)
+    mapper._make_request(URL)
+    assert clock.sleeps == []
@@ -0,0 +1,128 @@
+"""Tests for scoped mapping: query pushdown, early stop and local filters"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import github_team_repo_mapper
+from conftest import FakeOrg, make_repo, make_team
+from github_team_repo_mapper import GitHubTeamRepoMapper, MappingScope
+
+
+@pytest.fixture(autouse=True)
+def no_throttle(monkeypatch):
+    monkeypatch.setattr(github_team_repo_mapper.time, 'sleep', lambda seconds: None)
+
+
+def org_mapper(org):
+    mapper = GitHubTeamRepoMapper('token', 'acme')
+    mapper.session.request = org.request
+    return mapper
+
+
+def listing_urls(org, suffix):
+    return [url for method, url in org.calls if url.split('?')[0].endswith(suffix)]
+
+
+@pytest.fixture
+def catalog():
+    """Repositories with a spread of names, visibility, topics and update times"""
+    return [
+        make_repo('payments-api', private=True, topics=['billing'], updated_at='2024-06-01T00:00:00Z'),
+        make_repo('payments-web', topics=['billing', 'frontend'], updated_at='2024-05-01T00:00:00Z'),
+        make_repo('legacy-payments', private=True, archived=True, updated_at='2023-01-01T00:00:00Z'),
+        make_repo('docs', updated_at='2024-03-01T00:00:00Z'),
+        make_repo('infra', private=True, visibility='internal', topics=['ops'], updated_at='2022-01-01T00:00:00Z'),
+    ]
+
+
+def names(repositories):
+    return [repo.name for repo in repositories]
+
+
+@pytest.mark.parametrize('visibility, expected', [
+    # 'infra' is listed by type=private but reports visibility 'internal'
+    ('private', ['payments-api', 'legacy-payments']),
+    ('public', ['payments-web', 'docs']),
+])
+def test_public_private_visibility_is_sent_as_type(catalog, teams, visibility, expected):
+    org = FakeOrg(teams, catalog, {})
+    repositories = org_mapper(org).list_organization_repositories(MappingScope(visibility=visibility))
+    assert f'type={visibility}' in listing_urls(org, '/orgs/acme/repos')[0]
+    assert names(repositories) == expected
+
+
+def test_internal_visibility_is_filtered_locally(catalog, teams):
+    org = FakeOrg(teams, catalog, {})
+    repositories = org_mapper(org).list_organization_repositories(MappingScope(visibility='internal'))
+    assert 'type=' not in listing_urls(org, '/orgs/acme/repos')[0]
+    assert names(repositories) == ['infra']
+
+
+def hourly_repos(count):
+    """Repositories updated one hour apart, oldest first"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [make_repo(f'repo-{i:03d}', updated_at=(start + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%SZ'))
+            for i in range(count)]
+
+
+@pytest.mark.parametrize('since, pages, matching', [
+    ('2024-01-10T00:00:00Z', 1, 34),    # hours 216-249: all on the first (newest) page
+    ('2024-01-05T00:00:00Z', 2, 154),   # hours 96-249: the cutoff falls on page 2
+])
+def test_updated_since_stops_paginating_at_first_older_repository(teams, since, pages, matching):
+    repos = hourly_repos(250)
+    org = FakeOrg(teams, repos, {})
+    repositories = org_mapper(org).list_organization_repositories(MappingScope(updated_since=since))
+
+    urls = listing_urls(org, '/orgs/acme/repos')
+    assert all('sort=updated&direction=desc' in url for url in urls)
+    assert len(urls) == pages
+    assert names(repositories) == names(reversed(repos[250 - matching:]))
+
+
+def test_team_slugs_are_fetched_directly(repos):
+    teams = [make_team(slug) for slug in ('alpha', 'beta', 'gamma')]
+    org = FakeOrg(teams, repos, {})
+    found = org_mapper(org).list_organization_teams(MappingScope(team_slugs=['gamma', 'alpha', 'gamma']))
+    assert [team.slug for team in found] == ['gamma', 'alpha']
+    assert [url for method, url in org.calls] == [
+        'https://api.github.com/orgs/acme/teams/gamma',
+        'https://api.github.com/orgs/acme/teams/alpha',
+    ]
+
+
+@pytest.mark.parametrize('scope, expected', [
+    (MappingScope(repo_pattern='payments-*'), ['payments-api', 'payments-web']),
+    (MappingScope(repo_pattern='re:payments'), ['payments-api', 'payments-web', 'legacy-payments']),
+    (MappingScope(repo_pattern='re:^payments-(api|web)$'), ['payments-api', 'payments-web']),
+    (MappingScope(topics=['frontend', 'ops']), ['payments-web', 'infra']),
+    (MappingScope(visibility='private'), ['payments-api', 'legacy-payments']),
+    (MappingScope(archived=True), ['legacy-payments']),
+    (MappingScope(archived=False, topics=['billing']), ['payments-api', 'payments-web']),
+    (MappingScope(updated_since='2024-03-01'), ['payments-api', 'payments-web', 'docs']),
+])
+def test_matches_repository(catalog, scope, expected):
+    assert [repo.name for repo in catalog if scope.matches_repository(repo)] == expected
+
+
+def test_empty_filters_leave_scope_empty():
+    assert MappingScope(team_slugs=[], topics=[], repo_pattern='').is_empty
+    assert not MappingScope(topics=['billing']).is_empty
+
+
+@pytest.mark.parametrize('fields', [{'visibility': 'secret'}, {'updated_since': 'last tuesday'}])
+def test_invalid_scope_is_rejected(fields):
+    with pytest.raises(ValueError):
+        MappingScope(**fields)
+
+
+def test_scoped_mapping_checks_only_pairs_in_scope(catalog):
+    teams = [make_team(slug) for slug in ('alpha', 'beta')]
+    org = FakeOrg(teams, catalog, {('alpha', 'payments-api'): 'push'})
+    mapping = org_mapper(org).generate_complete_team_repo_mapping(
+        MappingScope(team_slugs=['alpha'], repo_pattern='payments-*'))
+    assert [url.split('/teams/')[1] for method, url in org.calls if '/repos/acme/' in url] == [
+        'alpha/repos/acme/payments-api', 'alpha/repos/acme/payments-web']
+    assert mapping['summary']['total_permissions_checked'] == 2
+    assert mapping['scope']['repo_pattern'] == 'payments-*'